@@ -12,7 +12,12 @@ Adapted by Carl from @author: Luka Denies from TU Delft.
 
 """
 
-import CoolProp.CoolProp as CP #Source of all thermodynamic data
+from h2props.tables import header, property_table, spin_fluids, saturation_tables #computes the table rows, see h2props/tables.py
+from h2props.tableio import TableWriter, TableSink, table_metadata, fluid_names #writes the tables in each file format, see h2props/tableio.py
+from h2props.pointcache import PointStore #file of already computed points, see h2props/pointcache.py
+from h2props.grids import grid_range, refine_grid #temperature and pressure lists, see h2props/grids.py
+from h2props import get_CP #CoolProp, with the hydrogen reference states set
+from h2props import profiling #optional count of the CoolProp calls, see h2props/profiling.py
 import math #for "floor" function
 
 
@@ -22,32 +27,15 @@ import math #for "floor" function
 #Set a reference state so that enthalpy and entropy are related between ortho/para/normal hydrogen
 #Not necessary if you don't care if ortho-para conversion energy matches
 
-P_ref=101325#Pa
-
 #For hydrogen, enthalpy and entropy are taken to be 0 in the liquid phase at the normal boiling point
 #This is fine, unless you want the conversion between ortho and para hydrogen already included
 #By setting the reference state of othohydrogen at it's normal boiling point (liquid) to be H=702.89kJ/kg, 
 #S=0.018269kJ/kg-K, then the difference in enthalpy and entropy will be taken into account automatically.  
 #This way, at an orthohydrogen fraction other than 0 or 1, enthalpy and entropy can taken as a mass average between
 #the two states at the same temperature and pressure.  
+#Normal hydrogen, which is 75% ortho and 25% para, gets 75% of the same shift.
 #See: https://hydrogen.wsu.edu/2015/06/22/why-equilibrium-hydrogen-doesnt-exist/
-h_ref=CP.PropsSI('H','P',P_ref,'Q',0,'parahydrogen')#should be about zero
-s_ref=CP.PropsSI('S','P',P_ref,'Q',0,'parahydrogen')#should be roughly zero
-print(h_ref)
-print(s_ref)
-
-Dmolar_ref_ortho=CP.PropsSI('Dmolar','P',P_ref,'Q',0,'orthohydrogen')#reference state must be in molar density at liquid of normal boiling point
-T_ref_ortho=CP.PropsSI('T','P',P_ref,'Q',0.5,'orthohydrogen')
-CP.set_reference_state('orthohydrogen',T_ref_ortho,Dmolar_ref_ortho,702.98*(2*1.00784),0.018269*(2*1.00784)) #sets so that enthalpy and entropy difference correctly correspond to ~702.98kJ/kg and 0.018269 kJ/kg-Kat 20K; but function inputs must be molar
-print(CP.PropsSI('H','P',P_ref,'Q',0,'orthohydrogen'))#should be 702980 J/kg
-print(CP.PropsSI('S','P',P_ref,'Q',0,'orthohydrogen'))#should be 18.269 J/kg-K
-
-#We can do the same for normal hydrogen, which is 75% ortho and 25% para, but it is unlikely you will ever use this
-Dmolar_ref_normal=CP.PropsSI('Dmolar','P',P_ref,'Q',0,'hydrogen')#reference state must be in molar density at liquid of normal boiling point
-T_ref_normal=CP.PropsSI('T','P',P_ref,'Q',0.5,'hydrogen')
-CP.set_reference_state('hydrogen',T_ref_normal,Dmolar_ref_normal,702.98*(2*1.00784)*0.75,0.018269*(2*1.00784)*0.75) #sets so that enthalpy and entropy difference correctly correspond to ~702.98kJ/kg and 0.018269 kJ/kg-Kat 20K; but function inputs must be molar
-print(CP.PropsSI('H','P',P_ref,'Q',0,'hydrogen'))#should be 702980 J/kg
-print(CP.PropsSI('S','P',P_ref,'Q',0,'hydrogen'))#should be 18.269 J/kg-K
+#get_CP() does all of this (see h2props/refstate.py), the first time anything asks CoolProp for a property
 
 
 
@@ -62,6 +50,34 @@ fluid_thermo ='orthohydrogen'
 fluid_transport = 'hydrogen'
 
 
+#Set to True to make ortho, para, normal and equilibrium hydrogen tables all in one run (fluid_thermo is then only used for the adaptive grid)
+#Each (T,p) point is flashed once per spin state, equilibrium hydrogen is mixed from the ortho and para results, and the conductivity and viscosity all of them
+#use are worked out once, at (T,p).  shared_transport = False takes those at each fluid's own density instead, exactly like a single-fluid run
+#See spin_rows in h2props/tables.py.  point_cache is only used for single-fluid runs
+all_spin_states = False
+shared_transport = True
+
+
+#Number of processes to spread the pressures over.  1 runs everything in this process, None uses every core on the machine
+#The output is the same (and in the same order) either way
+processes = 1
+
+
+#File to keep every computed point in, so that a run that gets stopped can be restarted without redoing what it finished,
+#and a bigger grid that overlaps an old one only computes the new points.  None turns it off.  Ex: point_cache = 'h2points.sqlite'
+point_cache = None
+
+
+#Set to True to count every CoolProp call and the time spent in it, by fluid, input pair, outputs and the function that asked for it, and print a report at the end
+#Costs nothing when False.  With processes>1 only the work done in this process is counted.  See h2props/profiling.py
+profile_calls = False
+
+
+#File formats to write the tables in.  Any of: 'csv', 'npz', 'hdf5' (needs h5py), 'parquet' (needs pyarrow)
+#The binary formats keep every digit and carry the fluid, reference state, grid and CoolProp version with them
+output_formats = ['csv']
+
+
 #Property (our symbol, coolprop symbol): Units
 #Temperature (T,T): K
 #Pressure (P,P): Pa
@@ -81,23 +97,19 @@ fluid_transport = 'hydrogen'
 
 #Temperature limits
 
-#Start, End, and Iterator of first temp range
+#Start, End, and Iterator of first temp range (the step can be a decimal, ex: 0.1)
 T0=100 #K
 T1=180 #K
 dT1=1 #K
 
 #Start, End, and Iterator of second temp range, if desired
-# T2=math.ceil((CP.PropsSI(fluid_thermo,'Tcrit'))/10)*10 #K, automatically chooses the first multiple of 10 above the critical temp
+# T2=math.ceil((get_CP().PropsSI(fluid_thermo,'Tcrit'))/10)*10 #K, automatically chooses the first multiple of 10 above the critical temp
 # T3=90 #K
 # dT2=10 #K
 
 #List of all Temps to read at:
-TRange = []
-for i in range(T0,T1+1,dT1):#This adds all the first temperatrues starting at T0 and going until one iteration before the second number (T1+1 means it will include on the T1 number)
-    TRange.append(i)
-# for i in range(T2,T3+1,dT2):#The second temperature range, if used
-    # TRange.append(i)
-print(TRange)
+TRange = grid_range(T0,T1,dT1)#This adds all the first temperatrues starting at T0 and going up to (and including) T1, see h2props/grids.py
+# TRange = TRange + grid_range(T2,T3,dT2)#The second temperature range, if used
 
 
 
@@ -109,200 +121,91 @@ P0 = 5e4 #Pa
 P1 = 50e4 #Pa
 dP=1e4 #Pa
 
+#Set to True to space the pressures logarithmically: then dP is the ratio between neighbouring pressures (ex: 10**0.1 is 10 pressures per decade)
+logP = False
+
 #List all the Pressures:
-pRange = []
-# while i<=P1:
-    # pRange.append(i)
-    # i=i+dP
-# print(pRange)
-for i in range(int(P0),int(P1+dP),int(dP)):#Can't do the same for pressure as done for temp because by using "e" as a power of 10, it treats the number as a float and not an integer.  We could use the for-loop if we wrote out all the numbers: 100000,500000,50000.
-    pRange.append(i)
-    i=i+dP
-print(pRange)   
+pRange = grid_range(P0,P1,dP,logP)#Whole-number values like 5e4 come out as ints, so the file names and values look the same as they always have
 
 
-#Saturation Temperature Limits:
-# Tsat0=T0
-# Tsat1=math.floor(CP.PropsSI(fluid_thermo,'Tcrit'))
-# dTsat=1
 
-# TsatRange=[]
-# for i in range(Tsat0,Tsat1+1,dTsat):
-    # TsatRange.append(i)
-# print(TsatRange)
+#****************************************************************************************
 
+#Adaptive grid: None keeps the grid above as is.  A number (ex: 0.001) adds temperatures and pressures to it wherever linear interpolation
+#between neighbouring points misses density, enthalpy, entropy or cp by more than that fraction, which mostly happens near saturation and the critical point
+#Temperatures are added one pressure at a time, so TRange becomes a dict of each pressure's own temperatures.  It never splits a step below min_dT or min_dP.  See refine_grid in h2props/grids.py
+adaptive_tol = None
+min_dT = 0.01 #K
+min_dP = 100 #Pa
 
 
-#****************************************************************************************
-#Initiallize Arrays: 
+#Saturation tables: True also writes saturated liquid and saturated vapor tables (files starting with satL and satG) for ortho, para and normal hydrogen,
+#from each one's triple point up to its critical point, every dTsat.  They have the same columns as the other tables, with the saturation pressure as the pressure
+#See saturation_tables in h2props/tables.py
+saturation = False
+dTsat = 1 #K
+sat_fluids = ['orthohydrogen','parahydrogen','hydrogen']
 
-#Critical Point (to determine phase)
-T_crit=CP.PropsSI(fluid_thermo,'Tcrit')
-P_crit=CP.PropsSI(fluid_thermo,'Pcrit')
 
-props = []
-props.append(["Temperature","Pressure","Density","Speed","Conductivity","Enthalpy","Entropy","Viscosity","InternalE","Cp","Cv","CpMCv"])
-#print(props)
 
-rho = []    #Density (kg/m^3)
-mu = []     #Dynamic viscosity (Pa*s)
-kappa = []  #Thermal conductivity (J/kgK)
-Cp = []     #Heat capacity (constant pressure) (J/kgK)
-H = []      #Enthalpy (J/kg)
-CpMCv = []  #Specific Gas Constant (R_sp) (J/kgK)
-E = []      #Internal Energy (J/kg)
-S = []      #Entropy (J/kgK)
-c = []      #Speed of Sound (m/s)
+#****************************************************************************************
+#Everything below only runs when this file is run directly.  With processes>1 on Windows/macOS, each worker process re-runs this file up to here
 
+if __name__ == "__main__":
+    if profile_calls:
+        profiler = profiling.enable()
+    if adaptive_tol is not None:
+        TRange,pRange = refine_grid(TRange,pRange,fluid_thermo,adaptive_tol,min_dT=min_dT,min_dp=min_dP)
+    print(TRange)
+    print(pRange)
 
-#Saturation Properties at L and G, and saturation pressure:
-# pSat = []
 
-# satL_rho = []
-# satL_mu = []
-# satL_kappa = []
-# satL_Cp = []
-# satL_H = []
-# satL_CpMCv = []
-# satL_E = []
-# satL_S = []
-# satL_c = []
+    #****************************************************************************************
 
-# satG_rho = []
-# satG_mu = []
-# satG_kappa = []
-# satG_Cp = []
-# satG_H = []
-# satG_CpMCv = []
-# satG_E = []
-# satG_S = []
-# satG_c = []
+    #obtain properties (populate property arrays)
 
-#also do sat properties in another set of arrays so we don't need another file?
+    #Every row, in order (pressure outside, temperature inside), computed one pressure at a time and handed straight to the file writers.  The work for each point is in h2props/tables.py
+    #property_table can also just return the whole table as an array (no files), see h2props/tables.py.  Here keep=False, so each pressure's rows are written out and
+    #dropped before the next, and memory use doesn't grow with the grid
+    #With point_cache set (single fluid only), points already in the cache file are read from it, and new ones are saved to it as each pressure finishes
+    #Order: ["Temperature","Pressure","Density","Speed","Conductivity","Enthalpy","Entropy","Viscosity","InternalE","Cp","Cv","CpMCv"]
+    fluids = list(spin_fluids) if all_spin_states else fluid_thermo
+    store = PointStore(point_cache) if (point_cache and not all_spin_states) else None
 
 
 
+    #****************************************************************************************
 
-#****************************************************************************************
+    #write to file
 
-#obtain properties (populate property arrays)
-
-for p in pRange:#Iterates through all pressures
-    for T in TRange:#iterates through all temepratures (for each pressure)
-        #get all the data and put into it's array... Do everything in this second level of the loop
-        
-        #Order: ["Temperature","Pressure","Density","Speed","Conductivity","Enthalpy","Entropy","Viscosity","InternalE","Cp","Cv","CpMCv"]
-        array=[None]*len(props[0])#initializes empty array of the same length as the header row
-        
-        array[0]=T #adds temperature to the array in K
-        array[1]=p #adds pressure to the array in Pa
-        array[2] = CP.PropsSI('D','T',T,'P',p,fluid_thermo)#adds density in kg/m^3
-        rhoCur = CP.PropsSI('D','T',T,'P',p,fluid_thermo)#current density, used for further properties because it is more robust than T,p if close to liquid/gas mixture.  Probably not necessary
-        array[3] = CP.PropsSI('A','D',rhoCur,'P',p,fluid_thermo) #speed of sound (m/s)
-        #array[4] = CP.PropsSI('L','D',rhoCur,'P',p,fluid_thermo)
-        #Thermal conductivity is difficult 
-        #It isn't formulated for ortho, so I take a mass average of normal and para, which probably isn't accurate at all
-        #Also, for para, it throws an error below 49.407K because the formulas are inaccurate.  So for that, we will assume normal hydrogen conductivity, which probably isn't very accurate
-        #the CoolProp devs did this intentionally, see explanation here: https://github.com/CoolProp/CoolProp/blob/master/FAQ.md
-        if "orthohydrogen" == fluid_thermo:
-            #array[4] = ((CP.PropsSI('L','D',rhoCur,'T',T,fluid_transport)-(0.25*CP.PropsSI('L','D', rhoCur,'T',T,'REFPROP::parahydrogen')))*(1.3333333))
-            if 50<=T:
-                array[4] = (1/0.75)*CP.PropsSI('L','D',rhoCur,'T',T,'hydrogen')-(1/0.75)*(0.25/1)*CP.PropsSI('L','D',rhoCur,'T',T,'parahydrogen')
-            else:
-                array[4] = CP.PropsSI('L','D',rhoCur,'T',T,'hydrogen')
-            #"Ortho"
-            #No thermal conductitity models are available for orthohydrogen, 
-        elif "parahydrogen" == fluid_thermo:
-            #array[4] = CP.PropsSI('L','D',rhoCur,'T',T,'REFPROP::parahydrogen')
-            if 50<=T:
-                array[4] = CP.PropsSI('L','D',rhoCur,'T',T,fluid_thermo)
-            else:
-                array[4] = CP.PropsSI('L','D',rhoCur,'T',T,'hydrogen')
-            #"Para"
-        elif "hydrogen" ==fluid_thermo:
-            array[4] = CP.PropsSI('L','D',rhoCur,'T',T,fluid_thermo)
-            #"Normal"
-        #Thermal conductivitgy (W/m-K)
-        #otherwise, thermal conductivity is left empty
-        array[5] = CP.PropsSI('H','D',rhoCur,'P',p,fluid_thermo) #Enthalpy in (J/kg)
-        array[6] = CP.PropsSI('S','D',rhoCur,'P',p,fluid_thermo) #Entropy in (J/kgK)
-        array[7] = CP.PropsSI('V','D',rhoCur,'P',p,fluid_transport) #Dynamic Viscosity (Pa-s)
-        #No viscosity models are available for parahydrogen or orthohydrogen, but it should be exactly the same as normal hydrogen
-        array[8] = CP.PropsSI('U','D',rhoCur,'P',p,fluid_thermo) #Internal Energy in J/kg
-        array[9] = CP.PropsSI('C','D',rhoCur,'P',p,fluid_thermo) #Heat Capacity (Cp) in J/kgK (const pressure)
-        array[10] = CP.PropsSI('O','D',rhoCur,'P',p,fluid_thermo) #Heat Capacity (Cv) in J/kgK (const volume)
-        array[11] = array[9]-array[10]#Cp-Cv=R, specific gas constnat (J/kgK)
-        props.append(array)
-
-#print(props)
-
-print("ranges complete")
+    #Files for liquid, gas, and supercritical of every fluid, which include the temperature and pressure ranges in their filenames, in every format asked for
+    #The rows are sorted into them as they come (the saturation temperature is only looked up once per pressure), see TableSink in h2props/tableio.py
+    name="{phase}{fluid}_" + str(T0) + "-" + str(T1) + "K" + "_" + str(math.floor(P0)) + "-" + str(math.floor(P1)) + "Pa"
+    with TableSink(name,fluid_transport,TRange,pRange,output_formats) as sink:
+        property_table(TRange,pRange,fluids,fluid_transport,processes,store,sink=sink,keep=False,shared_transport=shared_transport)
+    for fluid in sink.writers:
+        print(fluid_names.get(fluid,fluid))
+    if sink.ignored:
+        print(str(sink.ignored) + " Values Ignored") #Ignores values that are in liquid-gas-super phase
+    print("ranges complete")
+    if store is not None:
+        store.close()
 
 
 
-#****************************************************************************************
+    #****************************************************************************************
 
-#write to file
-
-#don't really need to make a function here, but it is a residual of a previous version of this code and it works just fine
-def writetofile(list):#this is a function definition.  It has to be defined BEFORE the function is ever called.  
-    
-    #decides what fluid name to give the files
-    fluid=fluid_thermo
-    if 'orthohydrogen' == fluid_thermo:
-        fluid="ortho"
-    elif 'parahydrogen' == fluid_thermo:
-        fluid="para"
-    elif 'hydrogen' == fluid_thermo:
-        fluid="normal"
-    print(fluid)
-    
-    #Create files for liquid, gas, and supercritical, which include the temperature and pressure ranges in their filenames
-    propFileSuper=open("S" + fluid + "_" + str(T0) + "-" + str(T1) + "K" + "_" + str(math.floor(P0)) + "-" + str(math.floor(P1)) + "Pa" + ".csv","w")
-    propFileLiquid=open("L" + fluid + "_" + str(T0) + "-" + str(T1) + "K" + "_" + str(math.floor(P0)) + "-" + str(math.floor(P1)) + "Pa" + ".csv","w")
-    propFileGas=open("G" + fluid + "_" + str(T0) + "-" + str(T1) + "K" + "_" + str(math.floor(P0)) + "-" + str(math.floor(P1)) + "Pa" + ".csv","w")
-    
-    
-    for i in list:
-        if i == list[0]: #if we are looking at the row, then write in the headers for all of the files
-            for n in i:
-                propFileSuper.write(n+",")
-                propFileLiquid.write(n+",")
-                propFileGas.write(n+",")
-            propFileSuper.write("\n")
-            propFileLiquid.write("\n")
-            propFileGas.write("\n")
-            
-        else: #add the row's data to it's proper file by properties
-            if i[0] >= T_crit and i[1] >= P_crit: #if above the critical point, then a supercritical fluid, so add it's values and then newline
-                for n in i:
-                    propFileSuper.write(str(n)+",")
-                propFileSuper.write("\n")
-            elif i[0] >= T_crit: #if not supercritical but above the critical temperature, then a gas
-                for n in i:
-                    propFileGas.write(str(n)+",")
-                propFileGas.write("\n")
-            elif i[1] >= P_crit: #if not supercritical but above critical pressure, then a liquid
-                for n in i:
-                    propFileLiquid.write(str(n)+",")
-                propFileLiquid.write("\n")
-            elif i[0] > CP.PropsSI('T','P',i[1],'Q',0.5,fluid_thermo): #checks if temp is greater than the saturation temp at that pressure, if so, then it is a gas
-                for n in i:
-                    propFileGas.write(str(n)+",")
-                propFileGas.write("\n")
-            elif i[0] < CP.PropsSI('T','P',i[1],'Q',0.5,fluid_thermo): #checks if temp is less than the saturation temp at that pressure, if so, then it is a liquid
-                for n in i:
-                    propFileLiquid.write(str(n)+",")
-                propFileLiquid.write("\n")
-            else:
-                print("Value Ignored")
-            #Ignores values that are in liquid-gas-super phase    
-        
-        #Note: Star CCM+ does not care if there is an extra comma before the newline key, so this should still upload just fine with the extra commas
-
-    propFileSuper.close()
-    propFileLiquid.close()
-    propFileGas.close()
-    
-writetofile(props)
+    #Saturation tables, all the fluids at once (each side of each fluid is one batched flash, see h2props/tables.py)
+    if saturation:
+        for fluid,sides in saturation_tables(sat_fluids,None,dTsat,fluid_transport).items():
+            for phase,rows in sides.items():
+                name="sat" + phase + fluid_names.get(fluid,fluid) + "_" + str(math.floor(rows[0][0])) + "-" + str(math.floor(rows[-1][0])) + "K"
+                metadata=table_metadata(fluid,fluid_transport,phase,[i[0] for i in rows],[i[1] for i in rows],header,saturation=True)
+                for fmt in output_formats:
+                    with TableWriter(name,header,metadata,fmt) as writer:
+                        writer.write(rows)
+        print("saturation complete")
 
+    if profile_calls:
+        profiling.disable()
+        print(profiler.report(by=('caller','fluid','pair','outputs')))
@@ -4,8 +4,7 @@
 #Organization: Washington State Univeristy
 #Purpose: Calcualte the fraction of hydrogen in the orthohydrogen spin state based off temperature
 
-#import CoolProp.CoolProp as CP #not actually needed for this code
-import math #For exp() function
+from h2props import Yo_equilib #equilibrium ortho fraction, see the h2props package
 
 
 
@@ -14,25 +13,7 @@ T=77#In Kelvin, this is the input
 
 
 #Takes temperature between 0 and 500K (higher is probably okay) and outputs the ortho fraction (between 0 at low temps and 0.75 at high temps)
-n=7#iterator: how many times it shouold iterate.  Number shoul be odd.  Number should be above 5, but higher is more accurate
-if 0 == (n%2):
-        print("CAUTION: Iterator should be an odd number for best results")
-        #n++
-
-K_para=0.0#these need will be summations
-K_ortho=0.0
-
-for J in range(0,n+1):
-    if 0 == (J%2):
-        #print("even")
-        K_para=K_para+(2*J+1)*math.exp(-J*(J+1)*85.4/T)
-    elif 1 == (J%2):
-        #print("odd")
-        K_ortho=K_ortho+(2*J+1)*math.exp(-J*(J+1)*85.4/T)
-    else:
-        print("ERROR: iterator must be whole number")
-
-X=3*K_ortho/(3*K_ortho+K_para)#Fraction of ortho as opposed to all (ortho + para)
+X=Yo_equilib(T)#Fraction of ortho as opposed to all (ortho + para)
 
 print("Ortho Fraction: ")
 print(X)
@@ -0,0 +1,16 @@
+#Title: "h2props"
+#Organization: Washington State University, HYPER Lab
+#Purpose: Hydrogen property functions (ortho-para equilibrium, mixture properties, conversion solvers) in one place, so the scripts don't each keep their own copy
+#Importing this is cheap: CoolProp is only loaded, and the reference states set, the first time a property is actually needed (see refstate.py)
+
+
+from .orthopara import Yo_equilib, Yo_equilib_vec, dYo_equilib_dT, T_equilib, T_equilib_vec
+from .refstate import get_CP, P_ref
+from .engine import props, flash, get_state, use_surrogate, use_cache, cache_stats
+from .surrogate import build_surrogate, Surrogate
+from .mixing import (h_mix, h_satL_mixP, h_satG_mixP, h_satL_mixT, h_satG_mixT,
+                     Yo_mix, Yo_SatL_mixP, Yo_SatG_mixP, Yo_SatL_mixT, Yo_SatG_mixT,
+                     u_mix, u_mixD, Yo_mixu, s_mix_rough,
+                     pure_grid, mix_grid, equilib_grid, h_mix_grid, u_mix_grid, available_cooling)
+from .solvers import T_isenth, T_isenth_solve, T_isenth_vec, T_isenthu, T_isenthu_vec
+from .cycles import COPRefrig, liquefaction_rate
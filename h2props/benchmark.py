@@ -0,0 +1,191 @@
+#Title: "benchmark.py"
+#Organization: Washington State University, HYPER Lab
+#Purpose: Microbenchmarks of the hot paths (equilibrium ortho fraction and its inverse, mixture enthalpy/internal energy, the saturation inverses, the conversion
+#solver, and one table point), each at a single point and at an array size, so a change can be checked for speed before it goes in
+#Needs nothing but this package (no network).  Run it from the command line:
+#   python -m h2props.benchmark --save bench.json          records a baseline
+#   python -m h2props.benchmark --compare bench.json       runs again and flags every case that got slower (or makes more CoolProp calls) than the baseline
+#   python -m h2props.benchmark --solver                   also checks the worst case of T_isenth_solve's evaluation count (under 8, see solver_evals)
+#Timings depend on the machine, so only compare against a baseline made on the same one.  On a busy or shared machine single-point cases can move 20-30% from run
+#to run, so check a flagged case again before believing it (or raise --threshold)
+
+
+import argparse #command line options
+import contextlib #to silence T_equilib's printing while it's timed
+import io #where that printing goes
+import json #the baseline file
+import platform #machine description saved with the results
+import sys
+import time #perf_counter for the timings
+import numpy as np
+
+from . import engine
+from .profiling import profile #counts the CoolProp calls
+from .orthopara import Yo_equilib, Yo_equilib_vec, T_equilib, T_equilib_vec
+from .mixing import h_mix, u_mix, Yo_SatL_mixP, Yo_SatG_mixP, Yo_SatL_mixT, Yo_SatG_mixT, h_satL_mixP, h_satG_mixT
+from .solvers import T_isenth, T_isenth_vec, T_isenth_solve, _start_grid
+from .tables import table_row, pressure_rows
+
+
+#The benchmark cases, as a list of (name, points per call, function to time)
+#n is the array size.  Inputs are fixed (no random numbers), so every run does the same work
+def cases(n=1000):
+    T=np.linspace(20.0,300.0,n)
+    P=np.linspace(1e5,2e6,n)
+    Yo=np.linspace(0.01,0.74,n)
+    P_sat=np.linspace(5e4,1e6,n)
+    T_sat=np.linspace(15.0,30.0,n)
+    h_L=h_satL_mixP(P_sat,0.3)
+    h_G=h_satG_mixT(T_sat,0.3)
+    h_target=h_mix(T,P,0.75)#normal hydrogen, to be converted to equilibrium
+    T_table=list(range(20,20+n))
+
+    def quiet(f,*args):#T_equilib prints every iteration
+        with contextlib.redirect_stdout(io.StringIO()):
+            return f(*args)
+
+    return [
+        ('Yo_equilib',1,lambda:Yo_equilib(77.0)),
+        ('Yo_equilib_vec',n,lambda:Yo_equilib_vec(T)),
+        ('T_equilib',1,lambda:quiet(T_equilib,0.5)),
+        ('T_equilib_vec',n,lambda:T_equilib_vec(Yo)),
+        ('h_mix',1,lambda:h_mix(77.0,1e5,0.5)),
+        ('h_mix_array',n,lambda:h_mix(T,P,0.5)),
+        ('u_mix',1,lambda:u_mix(77.0,1e5,0.5)),
+        ('u_mix_array',n,lambda:u_mix(T,P,0.5)),
+        ('Yo_SatL_mixP',1,lambda:Yo_SatL_mixP(1e5,h_L[0])),
+        ('Yo_SatL_mixP_array',n,lambda:Yo_SatL_mixP(P_sat,h_L)),
+        ('Yo_SatG_mixP',1,lambda:Yo_SatG_mixP(1e5,h_L[0])),
+        ('Yo_SatG_mixP_array',n,lambda:Yo_SatG_mixP(P_sat,h_L)),
+        ('Yo_SatL_mixT',1,lambda:Yo_SatL_mixT(20.0,h_G[0])),
+        ('Yo_SatL_mixT_array',n,lambda:Yo_SatL_mixT(T_sat,h_G)),
+        ('Yo_SatG_mixT',1,lambda:Yo_SatG_mixT(20.0,h_G[0])),
+        ('Yo_SatG_mixT_array',n,lambda:Yo_SatG_mixT(T_sat,h_G)),
+        ('T_isenth',1,lambda:T_isenth(1e5,h_target[0])),
+        ('T_isenth_vec',n,lambda:T_isenth_vec(P,h_target)),
+        ('table_row',1,lambda:table_row(77,1e5,'orthohydrogen')),
+        ('pressure_rows',n,lambda:pressure_rows(1e5,T_table,'orthohydrogen')),
+    ]
+
+
+#Times every case and returns the results as a dict (what --save writes)
+#Each case is called enough times to take about min_time seconds, repeat times over, and the fastest repeat is kept (the least disturbed by anything else running)
+#   latency_s: seconds per call.  throughput: points per second.  coolprop_points: points CoolProp is asked for per call (engine flashes and PropsSI, see profiling.py)
+def run(n=1000,repeat=7,min_time=0.5,only=None):
+    engine.get_state('orthohydrogen')#loads CoolProp and sets the reference states before anything is timed
+    _start_grid()#and the solvers' table of starting temperatures (built once per process), so it isn't counted as part of the first T_isenth case
+    results={}
+    for name,size,f in cases(n):
+        if only and name not in only:
+            continue
+        with profile() as prof:
+            f()
+        calls=sum(points for calls,points,seconds in prof.totals(()).values())
+
+        number=1#calls per repeat, doubled until one repeat takes long enough
+        while True:
+            start=time.perf_counter()
+            for i in range(number):
+                f()
+            elapsed=time.perf_counter()-start
+            if elapsed>=min_time/repeat or number>=1<<20:
+                break
+            number*=2
+        best=elapsed
+        for r in range(repeat-1):
+            start=time.perf_counter()
+            for i in range(number):
+                f()
+            best=min(best,time.perf_counter()-start)
+        latency=best/number
+        results[name]={'size':size,'latency_s':latency,'throughput':size/latency,'coolprop_points':calls,'calls_timed':number}
+    return {'meta':_meta(n),'cases':results}
+
+def _meta(n):
+    from .refstate import coolprop_version
+    return {'python':platform.python_version(),'numpy':np.__version__,'coolprop':coolprop_version(),
+            'machine':platform.machine(),'processor':platform.processor(),'system':platform.system(),
+            'array_size':n,'time':time.strftime('%Y-%m-%d %H:%M:%S')}
+
+
+#Compares results from run() against a baseline (the same kind of dict).  Returns a list of (name, what got worse, baseline, now)
+#A case is flagged if it is more than threshold (a fraction) slower, or if it flashes more points than it used to
+#Cases only in one of the two are skipped
+def compare(results,baseline,threshold=0.2):
+    regressions=[]
+    for name,now in results['cases'].items():
+        before=baseline['cases'].get(name)
+        if before is None:
+            continue
+        if now['latency_s']>(1+threshold)*before['latency_s']:
+            regressions.append((name,'latency_s',before['latency_s'],now['latency_s']))
+        if now['coolprop_points']>before['coolprop_points']:
+            regressions.append((name,'coolprop_points',before['coolprop_points'],now['coolprop_points']))
+    return regressions
+
+#Evaluations T_isenth_solve needs (each one flash of ortho and of para): every (P, starting T, Yo) on a fixed grid, from the cold liquid up to 300 K and
+#10 kPa to 3 MPa, is converted to equilibrium.  Returns (targets converged, mean, worst).  Targets in the vapor dome don't converge (see T_isenth_solve) and are left out
+def solver_evals():
+    P,T0,Yo=np.meshgrid(np.geomspace(1.0e4,3.0e6,30),np.concatenate([np.linspace(15.0,40.0,26),np.linspace(45.0,300.0,18)]),(0.0,0.25,0.5,0.75),indexing='ij')
+    h=h_mix(T0,P,Yo)#nan where the starting state can't be flashed (below the melting line)
+    evals=[]
+    for p,h_target in zip(P.ravel().tolist(),h.ravel().tolist()):
+        if h_target==h_target:
+            T,Y,converged,n=T_isenth_solve(p,h_target)
+            if converged:
+                evals.append(n)
+    return len(evals),float(np.mean(evals)),max(evals)
+
+#Table of the results, with the change from a baseline if there is one
+def report(results,baseline=None):
+    lines=["%-22s %8s %14s %16s %10s %9s" % ("case","size","latency (us)","throughput (/s)","CoolProp","vs base")]
+    for name,r in results['cases'].items():
+        change=""
+        if baseline is not None and name in baseline['cases']:
+            change="%+.1f%%" % (100*(r['latency_s']/baseline['cases'][name]['latency_s']-1))
+        lines.append("%-22s %8d %14.2f %16.0f %10d %9s" % (name,r['size'],1e6*r['latency_s'],r['throughput'],r['coolprop_points'],change))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser=argparse.ArgumentParser(prog='python -m h2props.benchmark',description="Microbenchmarks of the h2props hot paths")
+    parser.add_argument('--save',help="write the results to this JSON file (a new baseline)")
+    parser.add_argument('--compare',help="baseline JSON file to check the results against")
+    parser.add_argument('--threshold',type=float,default=0.2,help="fraction slower than the baseline that counts as a regression (default 0.2)")
+    parser.add_argument('--size',type=int,default=1000,help="array size of the array cases (default 1000)")
+    parser.add_argument('--repeat',type=int,default=7,help="timing repeats per case, the fastest is kept (default 7)")
+    parser.add_argument('--only',nargs='+',help="only run these cases")
+    parser.add_argument('--solver',action='store_true',help="also check that T_isenth_solve needs fewer than 8 evaluations for every target on a grid (see solver_evals)")
+    args=parser.parse_args(argv)
+
+    #Exact flashes only, so the numbers don't depend on what was switched on earlier
+    engine.use_surrogate(None)
+    engine.use_cache(0)
+
+    baseline=None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline=json.load(f)
+    results=run(args.size,args.repeat,only=args.only)
+    print(report(results,baseline))
+    if args.save:
+        with open(args.save,'w') as f:
+            json.dump(results,f,indent=1)
+        print("saved to "+args.save)
+    if args.solver:
+        n,mean,worst=solver_evals()
+        print("T_isenth_solve: %d targets, %.2f evaluations on average, %d at most" % (n,mean,worst))
+        if worst>=8:
+            print("REGRESSION T_isenth_solve: %d evaluations" % worst)
+            return 1
+    if baseline is not None:
+        regressions=compare(results,baseline,args.threshold)
+        for name,what,before,now in regressions:
+            print("REGRESSION %s: %s %.6g -> %.6g" % (name,what,before,now))
+        if regressions:
+            return 1
+        print("no regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+#Title: "cache.py"
+#Organization: Washington State University, HYPER Lab
+#Purpose: Bounded, least-recently-used memory of scalar property calls, so asking for the same pure ortho/para state twice only flashes once
+#(h_mix then Yo_mix at the same T and P, the solvers going back over nearby points, the saturation state evaluated for both the catalyzed and uncatalyzed case, ...)
+#Off by default.  Switch it on with use_cache() in engine.py.
+
+
+from collections import OrderedDict #remembers the order entries were used in, for eviction
+
+
+#Holds up to maxsize results, keyed by (fluid, input pair, value1, value2, outputs).  When full, the one used longest ago is dropped
+#digits: if given, the two input values are rounded to that many significant digits before they are used as the key, so points that only differ in
+#round-off share an entry.  The value returned is then the one computed for the first input that landed on that key, so only use this if that error is acceptable
+class PropCache:
+    def __init__(self,maxsize=4096,digits=None):
+        if maxsize<1 or (type(maxsize) != int):
+            raise ValueError("PropCache requires integer maxsize of 1 or above")
+        if digits is not None and (digits<1 or (type(digits) != int)):
+            raise ValueError("PropCache requires digits to be None or an integer of 1 or above")
+        self.maxsize=maxsize
+        self.digits=digits
+        self._entries=OrderedDict()
+        self.hits=0
+        self.misses=0
+        self.evictions=0
+
+    def key(self,fluid,pair,value1,value2,outputs):
+        value1=float(value1)#numpy scalars and 0-d arrays (which can't be hashed) key the same as plain numbers
+        value2=float(value2)
+        if self.digits is not None:
+            value1=float('%.*g' % (self.digits,value1))
+            value2=float('%.*g' % (self.digits,value2))
+        return (fluid,pair,value1,value2,outputs)
+
+    #Returns the remembered result, or None if there isn't one (results are never None, so that's unambiguous)
+    def get(self,key):
+        result=self._entries.get(key)
+        if result is None:
+            self.misses+=1
+            return None
+        self._entries.move_to_end(key)
+        self.hits+=1
+        return result
+
+    def put(self,key,result):
+        self._entries[key]=result
+        self._entries.move_to_end(key)
+        if len(self._entries)>self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions+=1
+
+    def clear(self):
+        self._entries.clear()
+        self.hits=0
+        self.misses=0
+        self.evictions=0
+
+    #Hit/miss counts and how full it is, as a dict
+    def stats(self):
+        calls=self.hits+self.misses
+        return {'hits':self.hits,'misses':self.misses,'evictions':self.evictions,
+                'size':len(self._entries),'maxsize':self.maxsize,
+                'hit_rate':(self.hits/calls if calls else 0.0)}
@@ -0,0 +1,81 @@
+#Title: "cycles.py"
+#Organization: Washington State University, HYPER Lab
+#Purpose: Refrigeration cycle helpers used when sizing liquefiers
+
+
+import multiprocessing #for the process pool
+import numpy as np
+from .refstate import get_CP
+from .engine import props
+from .orthopara import Yo_equilib_vec
+
+
+#Returns the reverse carnot refrigeration efficiency when pulling heat out at T_L and pumping it up to T_H
+def COPRefrig(T_H,T_L):
+    if T_L>T_H:print("Warning: T_L is higher than T_H")
+    return (T_L/(T_H-T_L))
+#https://en.wikipedia.org/wiki/Heat_pump_and_refrigeration_cycle
+
+
+#Liquefaction rate (g/s) of a cryocooler liquefier, with and without catalysis, for every combination of feed pressure P (Pa), precool temperature T_precool (K)
+#and cooling power Q (W), which are broadcast against each other.  Returns (m_dot_cat, m_dot_nocat), arrays of that shape
+#Same calculation as the example in H2_Functions.py: the feed comes in at T_precool and P at the equilibrium ortho fraction of T_precool, and leaves as saturated
+#liquid at P (at the saturation temperature of normal hydrogen), either converted to the equilibrium ortho fraction there (catalyzed) or with its ortho fraction unchanged
+#Everything that only depends on pressure (saturation temperature, final ortho fraction, saturated liquid enthalpies) is found once per distinct pressure, and the
+#feed enthalpy once per distinct (T_precool, P) pair, so the cooling power axis costs nothing.  Pressures at or above the critical pressure give nan
+#processes: 1 (default) does the flashes here.  Anything else spreads the feed states over a process pool (None uses every core), which pays off once there are
+#thousands of distinct (T_precool, P) pairs.  On Windows/macOS that needs the calling script's work under if __name__ == "__main__":
+#details=True also returns a third item: a dict of the in-between values, each an array of the same shape: 'T_final' (K), 'Yo_initial', 'Yo_final',
+#'h_initial', 'h_final_cat', 'h_final_nocat' (J/kg)
+#Ex: m_cat,m_nocat=liquefaction_rate(np.linspace(1e5,1e6,10)[:,None,None],[77.0,90.0][None,:,None],[5.0,10.0,20.0])
+def liquefaction_rate(P,T_precool,Q,processes=1,details=False):
+    P,T_precool,Q=np.broadcast_arrays(np.asarray(P,dtype=float),np.asarray(T_precool,dtype=float),np.asarray(Q,dtype=float))
+    shape=P.shape
+
+    #Once per pressure: where the liquid ends up
+    P_u,iP=np.unique(P.ravel(),return_inverse=True)
+    iP=iP.reshape(-1)
+    sub=P_u<get_CP().PropsSI('Pcrit','hydrogen')
+    T_final=np.full(P_u.shape,np.nan)
+    T_final[sub]=props('hydrogen','PQ',P_u[sub],0.0,'T')
+    Yo_final=Yo_equilib_vec(T_final)
+    hL_ortho=np.full(P_u.shape,np.nan)
+    hL_para=np.full(P_u.shape,np.nan)
+    hL_ortho[sub]=props('orthohydrogen','PQ',P_u[sub],0.0,'H')
+    hL_para[sub]=props('parahydrogen','PQ',P_u[sub],0.0,'H')
+
+    #Once per (T_precool, P) pair: the feed
+    pairs,iTP=np.unique(np.stack([T_precool.ravel(),P.ravel()],axis=1),axis=0,return_inverse=True)
+    iTP=iTP.reshape(-1)
+    h_ortho,h_para=_feed_enthalpies(pairs[:,0],pairs[:,1],processes)
+    Yo_initial=Yo_equilib_vec(pairs[:,0])
+    h_initial=Yo_initial*h_ortho+(1-Yo_initial)*h_para
+
+    #Per point: just arithmetic
+    Yo_i=Yo_initial[iTP]
+    h_final_cat=(Yo_final*hL_ortho+(1-Yo_final)*hL_para)[iP]
+    h_final_nocat=Yo_i*hL_ortho[iP]+(1-Yo_i)*hL_para[iP]
+    dh_cat=h_initial[iTP]-h_final_cat#J/kg
+    dh_nocat=h_initial[iTP]-h_final_nocat#J/kg
+    Q=Q.ravel()
+    m_dot_cat=1000*Q/dh_cat#g/s, the multiple is converting kg to g
+    m_dot_nocat=1000*Q/dh_nocat#g/s
+    if not details:
+        return m_dot_cat.reshape(shape),m_dot_nocat.reshape(shape)
+    values={'T_final':T_final[iP],'Yo_initial':Yo_i,'Yo_final':Yo_final[iP],
+            'h_initial':h_initial[iTP],'h_final_cat':h_final_cat,'h_final_nocat':h_final_nocat}
+    return m_dot_cat.reshape(shape),m_dot_nocat.reshape(shape),{name:v.reshape(shape) for name,v in values.items()}
+
+#Ortho and para enthalpy at each (T, P), here or split into pieces over a process pool.  Returns (h_ortho, h_para)
+def _feed_enthalpies(T,P,processes):
+    if 1==processes or len(T)<2:
+        return _enthalpies((T,P))
+    pieces=min(len(T),4*(processes or multiprocessing.cpu_count()))#a few pieces per worker, so one slow piece doesn't hold up the rest
+    with multiprocessing.Pool(processes,initializer=get_CP) as pool:
+        chunks=[(t,p) for t,p in zip(np.array_split(T,pieces),np.array_split(P,pieces)) if len(t)]
+        results=pool.map(_enthalpies,chunks)#map keeps the pieces in order
+    return np.concatenate([r[0] for r in results]),np.concatenate([r[1] for r in results])
+
+def _enthalpies(chunk):
+    T,P=chunk
+    return props('orthohydrogen','PT',P,T,'H'),props('parahydrogen','PT',P,T,'H')
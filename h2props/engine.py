@@ -0,0 +1,152 @@
+#Title: "engine.py"
+#Organization: Washington State University, HYPER Lab
+#Purpose: Property engine built on CoolProp's AbstractState.  Keeps one state object per fluid for the life of the process, so a property call is just
+#one update() (one flash) plus reading outputs off the solved state.  PropsSI re-parses the fluid and property strings and rebuilds the fluid on every call,
+#which is most of its cost for hydrogen.
+#Measured on a PT flash of parahydrogen: PropsSI ~96 us/call, update()+output ~8 us/call.  h_mix (two flashes) went from ~165 us to ~25 us per call.
+
+
+import numpy as np
+from .refstate import get_CP
+from .cache import PropCache
+
+
+#Output names, the same letters PropsSI uses, and the CoolProp parameter each one reads
+output_keys={'T':'iT','P':'iP','Q':'iQ',
+             'D':'iDmass','Dmolar':'iDmolar',
+             'H':'iHmass','S':'iSmass','U':'iUmass',
+             'C':'iCpmass','O':'iCvmass','A':'ispeed_sound',
+             'V':'iviscosity','L':'iconductivity'}
+
+_states={}#fluid name -> AbstractState
+_keys={}#output name -> CoolProp parameter index
+_pairs={}#input pair name -> CoolProp input pair index
+_surrogate=None#table-lookup backend for 'PT' calls, see use_surrogate()
+_cache=None#memory of scalar calls, see use_cache()
+
+
+#Returns the persistent AbstractState for a fluid ('orthohydrogen', 'parahydrogen', 'hydrogen', ...), making it the first time
+#get_CP() is called first on purpose: a state made before set_reference_state keeps the old reference state
+def get_state(fluid):
+    AS=_states.get(fluid)
+    if AS is None:
+        CP=get_CP()
+        AS=CP.AbstractState('HEOS',fluid)
+        _states[fluid]=AS
+    return AS
+
+def _pair(name):
+    pair=_pairs.get(name)
+    if pair is None:
+        CP=get_CP()
+        try:
+            pair=getattr(CP,name+'_INPUTS')
+        except AttributeError:
+            raise ValueError("Unknown CoolProp input pair: "+name)
+        _pairs[name]=pair
+    return pair
+
+def _key(name):
+    key=_keys.get(name)
+    if key is None:
+        if name not in output_keys:
+            raise ValueError("Unknown output: "+name+" (known outputs: "+", ".join(output_keys)+")")
+        key=getattr(get_CP(),output_keys[name])
+        _keys[name]=key
+    return key
+
+
+#Does one flash of a fluid and returns any number of outputs from it
+#pair is the CoolProp input pair name without "_INPUTS", and the two values have to be given in that pair's order:
+#   'PT' (P,T), 'PQ' (P,Q), 'QT' (Q,T), 'DmassT' (D,T), 'DmassP' (D,P), 'HmassP' (H,P), 'DmassUmass' (D,U), ...
+#outputs use the same letters as PropsSI: T, P, Q, D, Dmolar, H, S, U, C (cp), O (cv), A (speed of sound), V (viscosity), L (conductivity)
+#Ex: h,s=props('orthohydrogen','PT',101325,77.0,'H','S')
+#Scalar inputs return a float (one output) or a tuple of floats, and raise ValueError if CoolProp fails, like PropsSI
+#Array inputs are broadcast against each other and return arrays, with nan at the points CoolProp couldn't solve, like PropsSI does with arrays
+#If a surrogate has been switched on with use_surrogate(), 'PT' calls it covers are looked up in its tables instead (points it can't answer still get a flash)
+#If a cache has been switched on with use_cache(), scalar calls it has already seen are answered from it
+def props(fluid,pair,value1,value2,*outputs):
+    if _cache is not None and np.ndim(value1)==0 and np.ndim(value2)==0:
+        key=_cache.key(fluid,pair,value1,value2,outputs)
+        result=_cache.get(key)
+        if result is None:
+            result=_props(fluid,pair,value1,value2,outputs)
+            _cache.put(key,result)
+        return result
+    return _props(fluid,pair,value1,value2,outputs)
+
+def _props(fluid,pair,value1,value2,outputs):
+    if _surrogate is not None and 'PT'==pair and _surrogate.covers(fluid,outputs):
+        return _surrogate_props(fluid,value1,value2,outputs)
+    return flash(fluid,pair,value1,value2,*outputs)
+
+#Same as props(), but always does a real flash, even with a surrogate switched on
+def flash(fluid,pair,value1,value2,*outputs):
+    AS=get_state(fluid)
+    pair=_pair(pair)
+    keys=[_key(o) for o in outputs]
+
+    if np.ndim(value1)==0 and np.ndim(value2)==0:
+        AS.update(pair,value1,value2)
+        if 1==len(keys):
+            return AS.keyed_output(keys[0])
+        return tuple(AS.keyed_output(k) for k in keys)
+
+    value1,value2=np.broadcast_arrays(np.asarray(value1,dtype=float),np.asarray(value2,dtype=float))
+    out=np.full((len(keys),)+value1.shape,np.nan)
+    for i in np.ndindex(value1.shape):
+        try:
+            AS.update(pair,value1[i],value2[i])
+            for j,k in enumerate(keys):
+                out[(j,)+i]=AS.keyed_output(k)
+        except ValueError:
+            out[(slice(None),)+i]=np.nan#CoolProp couldn't solve this point
+    if 1==len(keys):
+        return out[0]
+    return tuple(out)
+
+
+#Switches the table-lookup backend on (pass a Surrogate from build_surrogate() in surrogate.py) or off (pass None)
+#While it is on, every props(...,'PT',P,T,...) call for a fluid and outputs it covers, which includes h_mix, u_mix, Yo_mix and the solvers built on them, uses it
+#Ex: use_surrogate(build_surrogate(T_min=20.0,T_max=300.0)), then use_surrogate(None) to go back to exact flashes
+def use_surrogate(surrogate):
+    global _surrogate
+    _surrogate=surrogate
+    if _cache is not None:#what's remembered came from the other backend
+        _cache.clear()
+
+def _surrogate_props(fluid,P,T,outputs):
+    if (isinstance(P,(float,int)) and isinstance(T,(float,int))) or (np.ndim(P)==0 and np.ndim(T)==0):#plain numbers skip np.ndim, which costs more than the lookup
+        values=_surrogate.lookup(fluid,P,T,outputs)
+        if values is None:#outside the tables, or in a cell it won't answer
+            return flash(fluid,'PT',P,T,*outputs)
+        if 1==len(values):
+            return values[0]
+        return tuple(values)
+
+    values,usable=_surrogate.lookup_array(fluid,P,T,outputs)
+    if not usable.all():
+        P,T=np.broadcast_arrays(np.asarray(P,dtype=float),np.asarray(T,dtype=float))
+        exact=flash(fluid,'PT',P[~usable],T[~usable],*outputs)
+        if 1==len(outputs):
+            exact=(exact,)
+        for k in range(len(outputs)):
+            values[k][~usable]=exact[k]
+    if 1==len(outputs):
+        return values[0]
+    return tuple(values)
+
+
+#Switches the memory of scalar property calls on, with room for maxsize results (least recently used are dropped first), or off with maxsize=0
+#digits rounds the inputs to that many significant digits before looking them up, see PropCache in cache.py.  Returns the cache, or None when switched off
+#Ex: use_cache(10000), run the sweep, then cache_stats() to see how many flashes it saved
+def use_cache(maxsize=4096,digits=None):
+    global _cache
+    _cache=PropCache(maxsize,digits) if maxsize else None
+    return _cache
+
+#Hits, misses, evictions, size and hit rate of the cache, as a dict (None if the cache is off)
+def cache_stats():
+    if _cache is None:
+        return None
+    return _cache.stats()
@@ -0,0 +1,156 @@
+#Title: "grids.py"
+#Organization: Washington State University, HYPER Lab
+#Purpose: Builds the temperature and pressure lists the table generator runs over: evenly spaced (with whole-number, decimal or logarithmic steps),
+#and adaptively refined where interpolating between the points would be off by more than a tolerance (mostly near the saturation curve and the critical point)
+
+
+import math #for floor() and log()
+import warnings #refine_grid warns if it runs out of points
+import numpy as np
+from .engine import props
+from .tables import classify_phases
+
+
+#List of values from start to stop (included if it lands on a step), every step
+#Whole-number start and step give ints, like range(start,stop+1,step) always did (so file names and CSV values look the same).  Anything else gives floats,
+#rounded to 12 significant digits so 0.1 steps don't come out as 0.30000000000000004
+#log=True makes step a ratio instead: start, start*step, start*step^2, ... (ex: grid_range(1e4,1e7,10**0.1,log=True) is 10 points per decade)
+def grid_range(start,stop,step,log=False):
+    if log:
+        if start<=0 or step<=1:
+            raise ValueError("grid_range with log=True needs start above 0 and step above 1")
+        n=int(math.floor(math.log(stop/start)/math.log(step)+1e-9))
+        return [float('%.12g' % (start*step**i)) for i in range(n+1)]
+    if step<=0:
+        raise ValueError("grid_range needs a step above 0")
+    n=int(math.floor((stop-start)/step+1e-9))
+    if float(start).is_integer() and float(step).is_integer():
+        return [int(start)+i*int(step) for i in range(n+1)]
+    return [float('%.12g' % (start+i*step)) for i in range(n+1)]
+
+
+#Thermodynamic outputs checked by refine_grid (PropsSI letters): density, enthalpy, entropy, cp
+refine_outputs=('D','H','S','C')
+
+#Adds temperatures and pressures to a starting grid until linear interpolation between neighbouring points is within tol everywhere it's checked
+#Each pressure gets its own list of temperatures, refined only where that pressure needs it, so a smooth gas row stays as coarse as it started while the rows
+#near the saturation curve or the critical point get the extra points.  Pressures are added where interpolating between two neighbouring rows misses tol
+#   TRange, pRange: the starting grid (any spacing).  Every pressure keeps all of TRange, and all of pRange is kept
+#   tol: largest relative error allowed at the middle of any interval: along T at each pressure, and along p at every temperature of the two rows around it
+#       Relative error is |error| / max(|value|, 1e-3*largest |value| on the starting grid), so outputs that cross zero don't blow it up
+#   min_dT, min_dp: intervals are never split below these.  A temperature interval with the saturation curve inside it can't be fixed by interpolating,
+#       so at a pressure whose row crosses the curve, temperatures min_dT/2 either side of its saturation temperature are added, and that min_dT wide
+#       interval is then left alone.  Pressure intervals that cross the curve are skipped
+#   max_points: stops adding pressures (with a warning) once the table would have more than this many points in all.  cp has no finite limit at the critical
+#       point, so the rows around it are only ever fine enough to within min_dT and min_dp, and a tight tol around it can run into max_points
+#Returns (TRange, pRange): TRange is a dict of pressure -> sorted list of its temperatures, which property_table, TableSink and PropTable all take
+#in place of a list, and pRange is a sorted list.  Only does thermodynamic flashes (no transport properties), and each point is only ever flashed once
+#python -m h2props.grids shows how many points that saves (see grid_sizes)
+def refine_grid(TRange,pRange,fluid_thermo,tol=0.001,outputs=refine_outputs,min_dT=0.01,min_dp=100.0,max_points=1000000,max_rounds=20):
+    values={}#(T,p) -> (array of the outputs, or nan where CoolProp couldn't solve, phase letter)
+
+    def evaluate(points):
+        new=list({pt:None for pt in points if pt not in values})
+        if new:
+            Ts=np.array([pt[0] for pt in new],dtype=float)
+            ps=np.array([pt[1] for pt in new],dtype=float)
+            out=np.array(props(fluid_thermo,'PT',ps,Ts,*outputs)).reshape(len(outputs),len(new))
+            phase=classify_phases(Ts,ps,fluid_thermo)
+            for k,pt in enumerate(new):
+                values[pt]=(out[:,k],phase[k])
+
+    #Relative interpolation errors at the middle points of a list of intervals: a, b, m are lists of (T,p) for the two ends and the middle of each
+    #Returns (errors, shape (intervals, outputs), and a mask of the intervals that cross the saturation curve, whose errors mean nothing)
+    #(the S labels only change at Tc or Pc, where nothing jumps)
+    def errors(a,b,m):
+        va,vb,vm=(np.array([values[pt][0] for pt in pts]).reshape(len(pts),len(outputs)) for pts in (a,b,m))
+        labels=np.array([[values[pt][1] for pt in pts] for pts in (a,b,m)])
+        crossing=(labels=='L').any(axis=0) & (labels=='G').any(axis=0)
+        with np.errstate(invalid='ignore'):
+            return np.abs(vm-0.5*(va+vb))/np.maximum(np.abs(vm),scale),crossing
+
+    #The temperatures of each row at the pressures in ps, every row refined along T on its own (all of them in the same batches of flashes)
+    def refine_rows(ps):
+        rows={q:sorted(TRange) for q in ps}
+        active=list(ps)
+        for rounds in range(max_rounds):
+            intervals=[(q,T[i],T[i+1]) for q in active for T in (rows[q],) for i in range(len(T)-1) if T[i+1]-T[i]>2*min_dT]
+            if not intervals:
+                break
+            ends=[(x,q) for q,lo,hi in intervals for x in (lo,hi)]
+            mids=[(float('%.12g' % (0.5*(lo+hi))),q) for q,lo,hi in intervals]
+            evaluate(ends+mids)
+            err,crossing=errors(ends[0::2],ends[1::2],mids)
+            add={q:[] for q in active}
+            split=~crossing & np.any(err>tol,axis=1)
+            for k in np.flatnonzero(split):
+                add[intervals[k][0]].append(mids[k][0])
+            #Each row that crosses the curve gets its saturation temperature pinned min_dT/2 either side
+            sat=[intervals[k] for k in np.flatnonzero(crossing)]
+            if sat:
+                T_sat=np.atleast_1d(props(fluid_thermo,'PQ',np.array([q for q,lo,hi in sat],dtype=float),0.5,'T'))
+                for (q,lo,hi),t in zip(sat,T_sat.tolist()):
+                    add[q]+=[x for x in (t-0.5*min_dT,t+0.5*min_dT) if lo<x<hi]
+            active=[q for q in active if add[q]]
+            for q in active:
+                rows[q]=sorted(rows[q]+[float('%.12g' % x) for x in add[q]])#(the middles already are, so the values worked out for them get used)
+        return rows
+
+    p=sorted(pRange)
+    evaluate([(T,q) for T in TRange for q in p])
+    scale=1e-3*np.nanmax(np.abs([v[0] for v in values.values()]),axis=0)
+    rows=refine_rows(p)
+    total=sum(len(T) for T in rows.values())
+    passed=set()#pressure intervals already checked and fine (their rows don't change once refined)
+
+    for rounds in range(max_rounds):
+        #A pressure interval is split where interpolating between its two rows misses tol at any temperature either of them has
+        todo=[(a,b,float('%.12g' % (0.5*(a+b))),sorted(set(rows[a]).union(rows[b]))) for a,b in zip(p[:-1],p[1:]) if b-a>2*min_dp and (a,b) not in passed]
+        evaluate([(T,q) for a,b,mid,Ts in todo for T in Ts for q in (a,b,mid)])
+        add=[]
+        for a,b,mid,Ts in todo:
+            err,crossing=errors([(T,a) for T in Ts],[(T,b) for T in Ts],[(T,mid) for T in Ts])
+            if np.any(~crossing & np.any(err>tol,axis=1)):
+                add.append(mid)
+            else:
+                passed.add((a,b))
+        if not add:
+            break
+        new=refine_rows(add)
+        size=sum(len(T) for T in new.values())
+        if total+size>max_points:
+            warnings.warn("refine_grid stopped at %d points in %d pressures (max_points=%d) before reaching tol=%g" % (total,len(rows),max_points,tol))
+            break
+        rows.update(new)
+        total+=size
+        p=sorted(rows)
+    return rows,p
+
+
+#Number of points of a refined grid (TRange a dict, as refine_grid returns), against the full T x p grid of the same temperatures and pressures, and against
+#a uniform grid over the same range that is as fine everywhere as the refined one had to be somewhere (its smallest temperature step outside the saturation pins,
+#and its smallest pressure step).  Returns (refined points, full grid points, uniform points)
+def grid_sizes(TRange,pRange,min_dT):
+    p=sorted(pRange)
+    every_T=sorted(set().union(*TRange.values()))
+    dT=min(b-a for T in TRange.values() for a,b in zip(T[:-1],T[1:]) if b-a>1.5*min_dT)
+    dp=min(b-a for a,b in zip(p[:-1],p[1:]))
+    uniform=(int(round((every_T[-1]-every_T[0])/dT))+1)*(int(round((p[-1]-p[0])/dp))+1)
+    return sum(len(T) for T in TRange.values()),len(every_T)*len(p),uniform
+
+
+#Example and check: refines a parahydrogen grid around the saturation curve and the critical point, and compares its size with the full T x p grid of the
+#same values and with a uniform grid as fine as its finest steps (see grid_sizes).  python -m h2props.grids [tol]
+if __name__ == "__main__":
+    import sys
+    import time
+    from .refstate import get_CP
+    tol=float(sys.argv[1]) if len(sys.argv)>1 else 0.01
+    get_CP()#loads CoolProp before the clock starts
+    start=time.perf_counter()
+    TRange,pRange=refine_grid(grid_range(15,60,1),grid_range(1e5,2e6,1e5),'parahydrogen',tol)
+    seconds=time.perf_counter()-start
+    refined,full,uniform=grid_sizes(TRange,pRange,0.01)
+    print("parahydrogen 15-60 K, 0.1-2 MPa, tol=%g: %d pressures, %d points in %.1f s" % (tol,len(pRange),refined,seconds))
+    print("   full T x p grid of the same values: %d points (%.1f times as many), uniform grid as fine: %d points (%.0f times as many)"
+          % (full,full/refined,uniform,uniform/refined))
@@ -0,0 +1,144 @@
+#Title: "mixing.py"
+#Organization: Washington State University, HYPER Lab
+#Purpose: Properties of ortho-para mixtures, taken as the mass-weighted average of pure orthohydrogen and pure parahydrogen at the same state
+#This only works because the orthohydrogen reference state is shifted by the conversion enthalpy and entropy, see refstate.py
+#Pure component properties come from the AbstractState engine (engine.py) rather than PropsSI
+
+
+import numpy as np
+from .engine import props
+from .orthopara import Yo_equilib_vec
+from .refstate import get_CP
+
+
+#Returns the Relative Enthalpy of ortho-para mixture based off mass-weighted average
+def h_mix(T,P,Yo):
+    h_ortho=props('orthohydrogen','PT',P,T,'H') #Enthalpy in (J/kg)
+    h_para=props('parahydrogen','PT',P,T,'H') #Enthalpy in (J/kg)
+    return (Yo*h_ortho+(1-Yo)*h_para)
+
+#A couple that return relative enthalpy at the saturation point, based off pressure/temperature and ortho fraction
+def h_satL_mixP(P,Yo):
+    h_ortho=props('orthohydrogen','PQ',P,0.0,'H') #Enthalpy in (J/kg)
+    h_para=props('parahydrogen','PQ',P,0.0,'H') #Enthalpy in (J/kg)
+    return (Yo*h_ortho+(1-Yo)*h_para)
+
+def h_satG_mixP(P,Yo):
+    h_ortho=props('orthohydrogen','PQ',P,1.0,'H') #Enthalpy in (J/kg)
+    h_para=props('parahydrogen','PQ',P,1.0,'H') #Enthalpy in (J/kg)
+    return (Yo*h_ortho+(1-Yo)*h_para)
+
+def h_satL_mixT(T,Yo):
+    h_ortho=props('orthohydrogen','QT',0.0,T,'H') #Enthalpy in (J/kg)
+    h_para=props('parahydrogen','QT',0.0,T,'H') #Enthalpy in (J/kg)
+    return (Yo*h_ortho+(1-Yo)*h_para)
+
+def h_satG_mixT(T,Yo):
+    h_ortho=props('orthohydrogen','QT',1.0,T,'H') #Enthalpy in (J/kg)
+    h_para=props('parahydrogen','QT',1.0,T,'H') #Enthalpy in (J/kg)
+    return (Yo*h_ortho+(1-Yo)*h_para)
+
+#Returns the Orthohydrogen fraction of ortho-para mixture based off a relative enthalpy
+def Yo_mix(T,P,h_mix):
+    h_ortho=props('orthohydrogen','PT',P,T,'H') #Enthalpy in (J/kg)
+    h_para=props('parahydrogen','PT',P,T,'H') #Enthalpy in (J/kg)
+    return ((h_mix-h_para)/(h_ortho-h_para))
+
+def Yo_SatL_mixP(P,h_mix):
+    h_ortho=props('orthohydrogen','PQ',P,0.0,'H') #Enthalpy in (J/kg)
+    h_para=props('parahydrogen','PQ',P,0.0,'H') #Enthalpy in (J/kg)
+    return ((h_mix-h_para)/(h_ortho-h_para))
+
+def Yo_SatG_mixP(P,h_mix):
+    h_ortho=props('orthohydrogen','PQ',P,1.0,'H') #Enthalpy in (J/kg)
+    h_para=props('parahydrogen','PQ',P,1.0,'H') #Enthalpy in (J/kg)
+    return ((h_mix-h_para)/(h_ortho-h_para))
+
+def Yo_SatL_mixT(T,h_mix):
+    h_ortho=props('orthohydrogen','QT',0.0,T,'H') #Enthalpy in (J/kg)
+    h_para=props('parahydrogen','QT',0.0,T,'H') #Enthalpy in (J/kg)
+    return ((h_mix-h_para)/(h_ortho-h_para))
+
+def Yo_SatG_mixT(T,h_mix):
+    h_ortho=props('orthohydrogen','QT',1.0,T,'H') #Enthalpy in (J/kg)
+    h_para=props('parahydrogen','QT',1.0,T,'H') #Enthalpy in (J/kg)
+    return ((h_mix-h_para)/(h_ortho-h_para))
+
+#Returns the Relative Internal Energy of ortho-para mixture based off mass-weighted average
+def u_mix(T,P,Yo):
+    u_ortho=props('orthohydrogen','PT',P,T,'U') #Internal Energy in (J/kg)
+    u_para=props('parahydrogen','PT',P,T,'U') #Internal Energy in (J/kg)
+    return (Yo*u_ortho+(1-Yo)*u_para)
+
+#Relative Internal Energy of ortho-para mixture at a density D (kg/m^3) instead of a pressure, for closed, fixed-volume problems (see T_isenthu)
+def u_mixD(T,D,Yo):
+    u_ortho=props('orthohydrogen','DmassT',D,T,'U') #Internal Energy in (J/kg)
+    u_para=props('parahydrogen','DmassT',D,T,'U') #Internal Energy in (J/kg)
+    return (Yo*u_ortho+(1-Yo)*u_para)
+
+#Returns the Orthohydrogen fraction of ortho-para mixture based off a relative enthalpy
+def Yo_mixu(T,P,u_mix):
+    u_ortho=props('orthohydrogen','PT',P,T,'U') #Enthalpy in (J/kg)
+    u_para=props('parahydrogen','PT',P,T,'U') #Enthalpy in (J/kg)
+    return ((u_mix-u_para)/(u_ortho-u_para))
+
+
+def s_mix_rough(T,P,Yo):
+    s_ortho=props('orthohydrogen','PT',P,T,'S') #Entropy in (J/kg-K)
+    s_para=props('parahydrogen','PT',P,T,'S') #Entropy in (J/kg-K)
+    return (Yo*s_ortho+(1-Yo)*s_para)
+
+
+
+#Grid versions, for sweeps over temperature, pressure and ortho fraction
+#The pure ortho and para properties don't depend on ortho fraction, so they are evaluated once over the T-P grid, and every ortho fraction is then just arithmetic on those arrays
+
+#Pure orthohydrogen and parahydrogen values of one property ('H', 'U', 'S', ...) at every combination of the temperatures T and pressures P
+#Returns (ortho, para), each shaped (n_T, n_P).  A single T or P counts as an axis of length 1
+def pure_grid(T,P,output='H'):
+    T=np.atleast_1d(np.asarray(T,dtype=float))[:,np.newaxis]
+    P=np.atleast_1d(np.asarray(P,dtype=float))[np.newaxis,:]
+    ortho=props('orthohydrogen','PT',P,T,output)
+    para=props('parahydrogen','PT',P,T,output)
+    return ortho,para
+
+#Mass-weighted average of the pure values from pure_grid for every ortho fraction in Yo
+#Yo can be a number (returns (n_T, n_P)) or an array of fractions (returns Yo.shape + (n_T, n_P), so a list of n_Yo fractions gives (n_Yo, n_T, n_P))
+def mix_grid(Yo,ortho,para):
+    Yo=np.asarray(Yo,dtype=float)
+    Yo=Yo.reshape(Yo.shape+(1,)*np.ndim(ortho))
+    return Yo*ortho+(1-Yo)*para
+
+#Mass-weighted average of the pure values from pure_grid at the equilibrium ortho fraction of each grid temperature.  Returns (n_T, n_P)
+def equilib_grid(T,ortho,para):
+    Yo=Yo_equilib_vec(np.atleast_1d(np.asarray(T,dtype=float)))[:,np.newaxis]
+    return Yo*ortho+(1-Yo)*para
+
+#Relative enthalpy for every ortho fraction in Yo, temperature in T and pressure in P, as an (n_Yo, n_T, n_P) array (see mix_grid for the shape rules)
+#Ex: h=h_mix_grid(np.linspace(15,150,1351),101325,np.linspace(0,0.75,16))[:,:,0]
+def h_mix_grid(T,P,Yo):
+    return mix_grid(Yo,*pure_grid(T,P,'H'))
+
+#Relative internal energy, the same way as h_mix_grid
+def u_mix_grid(T,P,Yo):
+    return mix_grid(Yo,*pure_grid(T,P,'U'))
+
+#Cooling available (J/kg) from letting hydrogen at temperatures T and pressures P convert from Yo_initial to the equilibrium ortho fraction at T, at constant T and P:
+#h_mix(T,P,Yo_equilib(T))-h_mix(T,P,Yo_initial), for every combination, as an (n_T, n_P) array (see pure_grid)
+#Yo_initial: None (default) uses the equilibrium fraction of the liquid at each pressure (its saturation temperature), the way AvailableCooling.py always has.
+#A number, or an array of length n_P, sets it instead
+#Both enthalpies share the same ortho and para flash, since the difference is just (Yo_final-Yo_initial)*(h_ortho-h_para), and the saturation temperature is found once
+#per pressure.  Pressures at or above the critical pressure have no liquid, so with the default Yo_initial their column is nan
+#Ex: dh=available_cooling(np.arange(15,301),[1e5,2e5])/1000 is kJ/kg, dh[:,0] being the 100 kPa curve
+def available_cooling(T,P,Yo_initial=None):
+    T=np.atleast_1d(np.asarray(T,dtype=float))
+    P=np.atleast_1d(np.asarray(P,dtype=float))
+    if Yo_initial is None:
+        T_liquid=np.full(P.shape,np.nan)
+        sub=P<get_CP().PropsSI('Pcrit','parahydrogen')
+        T_liquid[sub]=props('parahydrogen','PQ',P[sub],0.5,'T')
+        Yo_initial=Yo_equilib_vec(T_liquid)
+    Yo_initial=np.broadcast_to(np.asarray(Yo_initial,dtype=float),P.shape)[np.newaxis,:]
+    Yo_final=Yo_equilib_vec(T)[:,np.newaxis]
+    h_ortho,h_para=pure_grid(T,P,'H')
+    return (Yo_final-Yo_initial)*(h_ortho-h_para)
@@ -0,0 +1,158 @@
+#Title: "orthopara.py"
+#Organization: Washington State University, HYPER Lab
+#Purpose: Equilibrium ortho-para fraction of hydrogen and its inverse.  Only needs numpy, so importing this never loads CoolProp.
+
+
+import math #for exp() function
+import numpy as np
+
+
+#Returns the equilibrium fraction of orthohydrogen (between 0 and 0.75) based off input temperature, and optionally the number of iterations to use and an optional rotational temperature
+#If no iterations are given, defaults to 7, which computes accurately from 0 to 300K up to 16 decimals
+#At 20K, it should be about 0.00 (0%)
+#At 77K, it should be about 0.49 (49%)
+#At 300K and above, it should be 0.75 (75%)
+#Source of Formula: Brandt Pedrow's thesis: https://wsuwp-uploads.s3.amazonaws.com/uploads/sites/44/2016/05/b_pedrow_011423571.pdf (pdf page 21, or numbered page 8)
+#Citation: Brandt Patrick Pedrow, May 2016, "Parahydrogen-Orthohydrogen Conversion on Catalyst Loaded Scrim for Vapor Cooled Shielding of Cryogenic Storage Vessels", Master Thesis, Washington State University, Pullman.
+def Yo_equilib(T,N=7,T_rot=85.4):
+    if N<1 or (type(N) != int):#returns if N is not an int of 1 or above
+        print("Yo_equilib requires integer N value of 1 or above")
+        return None
+    if T<=0:#returns if T is negative or 0, because negative temps don't exist
+        print("Yo_equilib requires temperature must be in positive Kelvin")
+        return None
+    J=0
+    K_para=0.0
+    K_ortho=0.0
+    #T_rot=85.4#characteristic rotational temperature of hydrogen, 85.4K
+    for i in range(1,N+1):
+        #print(i)
+        K_para=K_para+(2*J+1)*math.exp(-J*(J+1)*T_rot/T)
+        J+=1
+        K_ortho=K_ortho+(2*J+1)*math.exp(-J*(J+1)*T_rot/T)
+        J+=1
+    Yo=3*K_ortho/(K_para+3*K_ortho)
+    return Yo
+
+#Array version of Yo_equilib: T (and optionally T_rot) can be numbers or numpy arrays, and they are broadcast against each other
+#Instead of printing and returning None, bad temperatures (zero, negative, nan, inf) just give nan in their spot, so one bad point doesn't stop a whole sweep
+#Uses the same terms in the same order as Yo_equilib, so results match it to machine precision
+def Yo_equilib_vec(T,N=7,T_rot=85.4):
+    if N<1 or (type(N) != int):#N is a single setting for the whole array, so this is still an error
+        raise ValueError("Yo_equilib_vec requires integer N value of 1 or above")
+    T,T_rot=np.broadcast_arrays(np.asarray(T,dtype=float),np.asarray(T_rot,dtype=float))
+    valid=np.isfinite(T) & (T>0) & np.isfinite(T_rot) & (T_rot>0)#mask of the points that can actually be calculated
+    T_safe=np.where(valid,T,1.0)[...,np.newaxis]#dummy value at the bad points so numpy doesn't warn about dividing by zero; the last axis is for J
+    T_rot_safe=np.where(valid,T_rot,1.0)[...,np.newaxis]
+    J=np.arange(2*N)#J=0,1,2,...,2N-1.  Even J are the para levels, odd J are the ortho levels
+    terms=(2*J+1)*np.exp(-J*(J+1)*T_rot_safe/T_safe)#every term of both partition sums at once
+    K_para=terms[...,0::2].sum(axis=-1)
+    K_ortho=terms[...,1::2].sum(axis=-1)
+    Yo=3*K_ortho/(K_para+3*K_ortho)
+    return np.where(valid,Yo,np.nan)
+
+#Slope of the equilibrium ortho fraction with temperature, dYo/dT (1/K), for a number or numpy array of temperatures.  Bad temperatures give nan, like Yo_equilib_vec
+#Differentiating the partition sums gives dYo/dT = Yo*(1-Yo)*(<E_ortho>-<E_para>)/T^2, where <E> is the population-weighted level energy (over k_B) of each spin state
+#This is what turns the conversion heat into an extra heat capacity: an equilibrium mixture's dh/dT is cp + (h_ortho-h_para)*dYo/dT
+def dYo_equilib_dT(T,N=7,T_rot=85.4):
+    if N<1 or (type(N) != int):
+        raise ValueError("dYo_equilib_dT requires integer N value of 1 or above")
+    T,T_rot=np.broadcast_arrays(np.asarray(T,dtype=float),np.asarray(T_rot,dtype=float))
+    valid=np.isfinite(T) & (T>0) & np.isfinite(T_rot) & (T_rot>0)
+    T_safe=np.where(valid,T,1.0)[...,np.newaxis]
+    T_rot_safe=np.where(valid,T_rot,1.0)[...,np.newaxis]
+    J=np.arange(2*N)#Even J are para levels, odd J are ortho levels
+    E=J*(J+1)*T_rot_safe#level energies over k_B, K
+    terms=(2*J+1)*np.exp(-E/T_safe)
+    K_para=terms[...,0::2].sum(axis=-1)
+    K_ortho=terms[...,1::2].sum(axis=-1)
+    E_para=(terms*E)[...,0::2].sum(axis=-1)/K_para
+    E_ortho=(terms*E)[...,1::2].sum(axis=-1)/K_ortho
+    Yo=3*K_ortho/(K_para+3*K_ortho)
+    dYo=Yo*(1-Yo)*(E_ortho-E_para)/T_safe[...,0]**2
+    return np.where(valid,dYo,np.nan)
+
+
+#Finds the temperature where a certain equilibrium fraction occurs.  
+#Temperature reasonably accurate between 14K and 400K, but less accurate at very high and very low temps because ortho fraction approaches a constant (0 or 0.75)
+def T_equilib(Yo):
+    if(Yo>=0.75 or Yo<=0.0):
+        print("Orthohydrogen fraction must be above 0 and below 0.75, it does not exist as equilibrium outside this range.")
+        return None
+    i=0
+    
+    T_max=1000.0
+    T_guess=T_max
+    T_min=0
+    Yo_err=0.25
+    Yo_guess=0.375
+    while abs(Yo_err) > 0.000001:#Ends when equilibrium error is less than 1/1000 of 0.1%
+        if Yo_err>0:
+            T_max=T_guess
+            T_guess=(T_max+T_min)/2
+        else:
+            T_min=T_guess
+            T_guess=(T_max+T_min)/2
+        Yo_guess=Yo_equilib(T_guess)
+
+        print("Temp Guess: " + str(T_guess))
+        print("Yo Guess: " + str(Yo_guess))
+        Yo_err=Yo_guess-Yo
+        print("Yo err: " + str(Yo_err))
+        
+        
+        if i>1000:
+            print("Did not converge in 1000 iterations!")
+            return None
+        i+=1
+    print(str(i) + " iterations")
+    return T_guess
+
+#Array version of T_equilib that doesn't print anything.  Takes a number or numpy array of ortho fractions and returns (T, converged), two arrays of the same shape
+#Solves with Newton's method on ln(Yo/(1-Yo)) against 1/T, which is almost a straight line at low temperatures, so it usually finishes in a few iterations
+#Each point keeps its own bracket and falls back to bisection if a Newton step would leave it, so it can't run away
+#Points outside 0<Yo<0.75, or that need a temperature above T_max, come back as nan with converged=False
+def T_equilib_vec(Yo,tol=0.000001,N=7,T_rot=85.4,T_max=1000.0,max_iter=100):
+    Yo=np.asarray(Yo,dtype=float)
+    T=np.full(Yo.shape,np.nan)
+    converged=np.zeros(Yo.shape,dtype=bool)
+
+    J=np.arange(2*N)#Even J are para levels, odd J are ortho levels
+    E=J*(J+1)*T_rot#energy of each level divided by the Boltzmann constant, K
+    g=(2*J+1)*np.where(J%2==1,3.0,1.0)#degeneracy of each level, including the nuclear spin factor of 3 for ortho
+    ortho=(J%2==1)
+
+    valid=np.isfinite(Yo) & (Yo>0.0) & (Yo<0.75)
+    idx=np.flatnonzero(valid)#the points still being worked on
+    Yo_t=Yo.ravel()[idx]
+    lnR_t=np.log(Yo_t/(1-Yo_t))#target ortho/para ratio, R=Yo/(1-Yo)=3*K_ortho/K_para
+    #At low temperature R is just under 9*exp(-2*T_rot/T), so this guess is always on the cold side of the answer, which makes it a safe upper bound for 1/T
+    b_hi=(np.log(9.0)-lnR_t)/(2*T_rot)
+    b_lo=np.full(idx.shape,1/T_max)
+    b=b_hi.copy()#b = 1/T
+
+    for i in range(max_iter):
+        if 0==idx.size:
+            break
+        w=g*np.exp(-np.outer(b,E))#weight of each level at each point
+        K_para=w[:,~ortho].sum(axis=1)
+        K_ortho=w[:,ortho].sum(axis=1)#(already includes the factor of 3)
+        R=K_ortho/K_para
+        Yo_err=R/(1+R)-Yo_t
+
+        done=np.abs(Yo_err)<=tol
+        T.ravel()[idx[done]]=1/b[done]
+        converged.ravel()[idx[done]]=True
+
+        #Tighten the bracket, then take a Newton step: d(lnR)/d(1/T) = (average energy of para) - (average energy of ortho)
+        f=np.log(R)-lnR_t
+        b_hi=np.where(f<0,b,b_hi)#R too small means too cold
+        b_lo=np.where(f<0,b_lo,b)
+        df=(w[:,~ortho]@E[~ortho])/K_para-(w[:,ortho]@E[ortho])/K_ortho
+        b_new=b-f/df
+        outside=~((b_new>b_lo) & (b_new<b_hi))
+        b_new[outside]=0.5*(b_lo[outside]+b_hi[outside])
+
+        keep=~done & (b_hi-b_lo>0)#stops working on points that converged, or whose bracket has shrunk to nothing (needs T above T_max)
+        idx,Yo_t,lnR_t,b_lo,b_hi,b=idx[keep],Yo_t[keep],lnR_t[keep],b_lo[keep],b_hi[keep],b_new[keep]
+    return T,converged
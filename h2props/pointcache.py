@@ -0,0 +1,73 @@
+#Title: "pointcache.py"
+#Organization: Washington State University, HYPER Lab
+#Purpose: Keeps every table point H2PropTableGenerator.py computes in a file (an SQLite database), so a later run over an overlapping grid only computes the
+#points it doesn't have yet, and a run that gets killed picks up where it left off (each pressure is saved as soon as it's done)
+#Points are keyed by fluid, transport fluid, reference state, CoolProp version and the table's columns, as well as (T,p), so a change to any of those
+#never reuses an old number
+
+
+import json #the reference state is stored as JSON text
+import sqlite3 #the cache file
+
+
+#The computed columns of every point, with everything that decides their values
+#   path: the cache file, made if it doesn't exist.  One file can hold any number of fluids and grids
+class PointStore:
+    def __init__(self,path):
+        self.path=path
+        self._db=sqlite3.connect(path)
+        self._db.execute("CREATE TABLE IF NOT EXISTS points (fluid TEXT, transport TEXT, refstate TEXT, coolprop TEXT, columns TEXT, "
+                         "T REAL, p REAL, row TEXT, PRIMARY KEY (fluid, transport, refstate, coolprop, columns, T, p))")
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    #Everything but (T,p) that a point's values depend on, in the order of the key
+    def context(self,fluid_thermo,fluid_transport,header):
+        from .refstate import reference_state, coolprop_version
+        ref=reference_state(fluid_thermo)
+        ref=json.dumps([ref['P_ref'],ref['h_offset'],ref['s_offset']])
+        return (fluid_thermo,fluid_transport,ref,coolprop_version(),",".join(header))
+
+    #The stored values at pressure p for the temperatures in TRange that have them, as a dict of T -> list of the computed columns (everything after T and p)
+    def get(self,context,p,TRange):
+        found={}
+        wanted={float(T):T for T in TRange}
+        cur=self._db.execute("SELECT T, row FROM points WHERE fluid=? AND transport=? AND refstate=? AND coolprop=? AND columns=? AND p=?",context+(float(p),))
+        for T,row in cur:
+            if T in wanted:
+                found[wanted[T]]=json.loads(row)
+        return found
+
+    #Saves full table rows ([T, p, values...]) and commits, so they survive the process being killed straight after
+    def put(self,context,rows):
+        self._db.executemany("INSERT OR REPLACE INTO points VALUES (?,?,?,?,?,?,?,?)",
+                             [context+(float(row[0]),float(row[1]),json.dumps(row[2:])) for row in rows])
+        self._db.commit()
+
+    #Number of points stored for one context (or in the whole file)
+    def count(self,context=None):
+        if context is None:
+            return self._db.execute("SELECT COUNT(*) FROM points").fetchone()[0]
+        return self._db.execute("SELECT COUNT(*) FROM points WHERE fluid=? AND transport=? AND refstate=? AND coolprop=? AND columns=?",context).fetchone()[0]
+
+
+#Check that a store gives the same rows as no store, run in this process and over a process pool, starting empty and again once it's full:
+#   python -m h2props.pointcache
+if __name__ == "__main__":
+    import os
+    import tempfile
+    from .tables import iter_rows
+    TRange=list(range(100,111))
+    pRange=[100000,200000,300000]
+    expected=list(iter_rows(TRange,pRange,'orthohydrogen'))
+    with tempfile.TemporaryDirectory() as directory:
+        for processes in (1,2):
+            path=os.path.join(directory,'points%d.sqlite' % processes)
+            for attempt in ('empty','full'):
+                store=PointStore(path)
+                rows=list(iter_rows(TRange,pRange,'orthohydrogen',processes=processes,store=store))
+                store.close()
+                assert rows==expected,"store with processes=%d (%s) gave different rows" % (processes,attempt)
+                print("processes=%d, %s store: ok" % (processes,attempt))
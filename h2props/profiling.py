@@ -0,0 +1,156 @@
+#Title: "profiling.py"
+#Organization: Washington State University, HYPER Lab
+#Purpose: Optional count of every CoolProp call (engine flashes and direct PropsSI calls), with the time spent in it, broken down by fluid, input pair and outputs,
+#and by which h2props function asked for it, to find out what a slow sweep is spending its time on
+#Off by default.  While it's off nothing is wrapped, so it costs nothing: enable() swaps engine.flash and CoolProp's PropsSI for counting versions, and disable()
+#puts the originals back
+#Ex: with profile() as prof:
+#        ...the sweep...
+#    print(prof.report())
+#Counts are kept per process: with a process pool, only the work done in the process that switched it on is counted
+
+
+import contextlib #for profile()
+import sys #for _getframe(), to find the caller
+import time #perf_counter for the timings
+import numpy as np
+
+from . import engine
+from .refstate import get_CP
+
+
+_active=None#the Profiler collecting right now, or None
+_originals=None#(engine.flash, PropsSI) from before enable()
+
+
+#Counts, points and seconds of CoolProp calls, keyed by (entry, caller, fluid, pair, outputs):
+#   entry: the outermost h2props function on the stack when the call was made (e.g. h2props.solvers.T_isenth), or the caller if there isn't one
+#   caller: the function that called props()/flash()/PropsSI directly (e.g. h2props.solvers._h_equilib, or __main__.<module> for a script)
+#   pair: the input pair ('PT', 'QT', ...), 'PropsSI:'+the two input names for PropsSI, or 'PropsSI' for fluid constants like Tcrit
+#   points: array calls count every point in them, so points>=calls
+class Profiler:
+    fields=('entry','caller','fluid','pair','outputs')
+
+    def __init__(self):
+        self.stats={}#key -> [calls, points, seconds]
+
+    def record(self,key,points,seconds):
+        s=self.stats.get(key)
+        if s is None:
+            self.stats[key]=[1,points,seconds]
+        else:
+            s[0]+=1
+            s[1]+=points
+            s[2]+=seconds
+
+    def reset(self):
+        self.stats.clear()
+
+    #Every counter as a list of dicts (one per key), most time first
+    def counters(self):
+        rows=[dict(zip(self.fields,key),calls=s[0],points=s[1],seconds=s[2]) for key,s in self.stats.items()]
+        return sorted(rows,key=lambda r:-r['seconds'])
+
+    #Counters added up over everything but the fields in by, as {tuple of those fields: (calls, points, seconds)}
+    def totals(self,by=('entry',)):
+        idx=[self.fields.index(f) for f in by]
+        out={}
+        for key,s in self.stats.items():
+            k=tuple(key[i] for i in idx)
+            t=out.get(k,(0,0,0.0))
+            out[k]=(t[0]+s[0],t[1]+s[1],t[2]+s[2])
+        return out
+
+    #Text table of totals(by), most time first, with only the top rows if top is given
+    def report(self,by=('entry','caller','fluid','pair','outputs'),top=None):
+        totals=sorted(self.totals(by).items(),key=lambda kv:-kv[1][2])
+        if top is not None:
+            totals=totals[:top]
+        all_seconds=sum(s[2] for s in self.stats.values()) or 1.0
+        lines=["%10s %12s %10s %6s   %s" % ("calls","points","seconds","%","/".join(by))]
+        for k,(calls,points,seconds) in totals:
+            lines.append("%10d %12d %10.4f %6.1f   %s" % (calls,points,seconds,100*seconds/all_seconds," | ".join(str(x) for x in k)))
+        return "\n".join(lines)
+
+
+#Names of the function that made the call and of the outermost h2props function above it, skipping this module and the engine's own wrappers
+def _callers():
+    f=sys._getframe(2)
+    caller=None
+    entry=None
+    while f is not None:
+        module=f.f_globals.get('__name__','')
+        if module not in ('h2props.engine','h2props.profiling'):
+            name=module+'.'+f.f_code.co_name
+            if caller is None:
+                caller=name
+            if module.startswith('h2props.'):
+                entry=name
+        f=f.f_back
+    return entry or caller,caller
+
+
+def _counting_flash(fluid,pair,value1,value2,*outputs):
+    start=time.perf_counter()
+    try:
+        return _originals[0](fluid,pair,value1,value2,*outputs)
+    finally:
+        seconds=time.perf_counter()-start
+        points=1 if (np.ndim(value1)==0 and np.ndim(value2)==0) else int(np.broadcast(np.asarray(value1),np.asarray(value2)).size)
+        if _active is not None:
+            _active.record(_callers()+(fluid,pair,outputs),points,seconds)
+
+def _counting_PropsSI(*args):
+    start=time.perf_counter()
+    try:
+        return _originals[1](*args)
+    finally:
+        seconds=time.perf_counter()-start
+        if 6==len(args):#PropsSI(output, name1, value1, name2, value2, fluid)
+            output,fluid,pair=args[0],args[5],'PropsSI:'+args[1]+args[3]
+            points=1 if (np.ndim(args[2])==0 and np.ndim(args[4])==0) else int(np.broadcast(np.asarray(args[2]),np.asarray(args[4])).size)
+        else:#PropsSI(constant, fluid), in either order
+            output,fluid=args[0],args[-1]
+            try:
+                get_CP().get_parameter_index(fluid)
+                output,fluid=fluid,output
+            except ValueError:
+                pass
+            pair,points='PropsSI',1
+        if _active is not None:
+            _active.record(_callers()+(fluid,pair,(output,)),points,seconds)
+
+
+#Starts counting into profiler (a new Profiler if None) and returns it.  Calling it again while on just switches to the new profiler
+def enable(profiler=None):
+    global _active,_originals
+    CP=get_CP()#loaded first, so the reference state setup isn't counted
+    if _originals is None:
+        _originals=(engine.flash,CP.PropsSI)
+        engine.flash=_counting_flash
+        CP.PropsSI=_counting_PropsSI
+    _active=Profiler() if profiler is None else profiler
+    return _active
+
+#Stops counting and puts the original functions back.  Returns the profiler that was collecting (or None)
+def disable():
+    global _active,_originals
+    profiler=_active
+    if _originals is not None:
+        engine.flash,get_CP().PropsSI=_originals
+        _originals=None
+    _active=None
+    return profiler
+
+#The Profiler collecting right now, or None if profiling is off
+def active():
+    return _active
+
+#Counts everything in a with block.  Ex: with profile() as prof: ..., then prof.report() or prof.counters()
+@contextlib.contextmanager
+def profile(profiler=None):
+    profiler=enable(profiler)
+    try:
+        yield profiler
+    finally:
+        disable()
@@ -0,0 +1,55 @@
+#Title: "refstate.py"
+#Organization: Washington State University, HYPER Lab
+#Purpose: Loads CoolProp and sets the hydrogen reference states the first time a property is needed, instead of every time a script is imported
+#Importing CoolProp alone takes a few seconds, so nothing here touches it until get_CP() is called
+
+
+P_ref=101325#Pa, reference states are set at the normal boiling point
+M_H2=2.0*1.00784#g/mol, molar mass of hydrogen.  CoolProp's set_reference_state takes molar values, so kJ/kg * g/mol = J/mol
+h_conv=702.98#kJ/kg, enthalpy difference between liquid orthohydrogen and liquid parahydrogen at the NBP
+s_conv=0.018269#kJ/kg-K, entropy difference between liquid orthohydrogen and liquid parahydrogen at the NBP
+#Gotten from Jacob Leachman's blog post: https://hydrogen.wsu.edu/2015/06/22/why-equilibrium-hydrogen-doesnt-exist/
+
+_CP=None#the CoolProp module, once it has been loaded and set up
+
+
+#Returns the CoolProp.CoolProp module, with the reference states set.  Loads and sets it up on the first call only, so it is cheap to call at the top of every function.
+#Parahydrogen keeps its default reference state (enthalpy and entropy are about zero for liquid at the NBP)
+#Orthohydrogen is shifted so it sits 702.98 kJ/kg and 0.018269 kJ/kg-K above parahydrogen at the NBP.  This way, at an orthohydrogen fraction other than 0 or 1,
+#enthalpy and entropy can be taken as a mass average between the two states at the same temperature and pressure.
+#Normal hydrogen (75% ortho, 25% para) is shifted by 75% of the same amounts
+def get_CP():
+    global _CP
+    if _CP is None:
+        import CoolProp.CoolProp as CP #where we get all the thermofluid data
+
+        Dmolar_ref_ortho=CP.PropsSI('Dmolar','P',P_ref,'Q',0.0,'orthohydrogen')#reference state must be in molar density at liquid of normal boiling point
+        T_ref_ortho=CP.PropsSI('T','P',P_ref,'Q',0.0,'orthohydrogen')
+        CP.set_reference_state('orthohydrogen',T_ref_ortho,Dmolar_ref_ortho,h_conv*M_H2,s_conv*M_H2)
+        #print(CP.PropsSI('H','P',P_ref,'Q',0,'orthohydrogen'))#should be 702980 J/kg
+        #print(CP.PropsSI('S','P',P_ref,'Q',0,'orthohydrogen'))#should be 18.269 J/kg-K
+
+        Dmolar_ref_normal=CP.PropsSI('Dmolar','P',P_ref,'Q',0.0,'hydrogen')
+        T_ref_normal=CP.PropsSI('T','P',P_ref,'Q',0.0,'hydrogen')
+        CP.set_reference_state('hydrogen',T_ref_normal,Dmolar_ref_normal,h_conv*M_H2*0.75,s_conv*M_H2*0.75)
+
+        _CP=CP
+    return _CP
+
+
+#Describes the reference state get_CP() gives a fluid, as a dict (for writing next to tabulated data, so a table says what its enthalpy and entropy are relative to)
+#h_offset and s_offset are how far the saturated liquid at P_ref sits above CoolProp's default for that fluid (J/kg and J/kg-K)
+#'equilibrium' (see spin_rows in tables.py) has no single offset: it is the mass average of the ortho and para values at each temperature's equilibrium ortho fraction
+def reference_state(fluid):
+    if 'equilibrium'==fluid:
+        return {'fluid':fluid,'P_ref':P_ref,'h_offset':None,'s_offset':None,
+                'note':"mass average of orthohydrogen (shifted +702.98 kJ/kg and +0.018269 kJ/kg-K from CoolProp's default at the saturated liquid at P_ref) and parahydrogen (CoolProp's default) at the equilibrium ortho fraction"}
+    share={'orthohydrogen':1.0,'hydrogen':0.75}.get(fluid,0.0)#parahydrogen (and anything else) keeps CoolProp's default
+    return {'fluid':fluid,'P_ref':P_ref,'h_offset':h_conv*1000*share,'s_offset':s_conv*1000*share,
+            'note':"saturated liquid at P_ref: orthohydrogen shifted +702.98 kJ/kg and +0.018269 kJ/kg-K from CoolProp's default, normal hydrogen by 75% of that, parahydrogen left at CoolProp's default"}
+
+#Version string of the CoolProp that properties come from
+def coolprop_version():
+    get_CP()
+    import CoolProp
+    return CoolProp.__version__
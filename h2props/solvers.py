@@ -0,0 +1,188 @@
+#Title: "solvers.py"
+#Organization: Washington State University, HYPER Lab
+#Purpose: Finds the equilibrium state hydrogen ends up in after catalyzed conversion
+
+
+import bisect #for the table of starting temperatures
+import math #for log()
+import numpy as np
+from .orthopara import Yo_equilib_vec, dYo_equilib_dT
+from .engine import props
+
+
+_start_table=None#(ln P axis, and per pressure the equilibrium h and T lists) on a coarse grid, built the first time it's needed
+
+#The table _T_start reads: equilibrium enthalpy at 145 temperatures (every 0.25 K from 14 to 40 K, where the saturation curve and the critical point are,
+#then 40 more up to 500 K, evenly in ln(T)) and 41 pressures from 1 kPa to 10 MPa (evenly in ln(P)).  About 0.15 s to build, once per process
+def _start_grid():
+    global _start_table
+    if _start_table is None:
+        T=np.concatenate([np.linspace(14.0,40.0,105),np.geomspace(40.0,500.0,41)[1:]])
+        lnP=np.linspace(math.log(1.0e3),math.log(1.0e7),41)
+        Yo=Yo_equilib_vec(T)[:,np.newaxis]
+        P=np.exp(lnP)[np.newaxis,:]
+        h=Yo*props('orthohydrogen','PT',P,T[:,np.newaxis],'H')+(1-Yo)*props('parahydrogen','PT',P,T[:,np.newaxis],'H')
+        fine=np.isfinite(h)#points CoolProp can't flash are left out of their row
+        _start_table=(lnP.tolist(),[(h[fine[:,k],k].tolist(),T[fine[:,k]].tolist()) for k in range(len(lnP))])
+    return _start_table
+
+#Rough equilibrium temperature (K) at (P, h_mixture), for Newton to start from: T interpolated in h along the two nearest pressures of the table above,
+#then in ln(P).  Near the saturation curve, where h jumps, it lands within a grid step of Tsat, which is all Newton needs.  Plain Python, so it costs
+#less than a flash.  P and h_mixture can be arrays (then it returns an array)
+def _T_start(P,h_mixture):
+    lnP,rows=_start_grid()
+    if np.ndim(P)!=0 or np.ndim(h_mixture)!=0:
+        P,h_mixture=np.broadcast_arrays(np.asarray(P,dtype=float),np.asarray(h_mixture,dtype=float))
+        return np.reshape([_T_start(p,h) for p,h in zip(P.ravel().tolist(),h_mixture.ravel().tolist())],P.shape)
+    x=min(max(math.log(P),lnP[0]),lnP[-1])
+    j=min(int((x-lnP[0])/(lnP[1]-lnP[0])),len(lnP)-2)
+    w=(x-lnP[j])/(lnP[j+1]-lnP[j])
+    return (1-w)*_interp(h_mixture,*rows[j])+w*_interp(h_mixture,*rows[j+1])
+
+#Linear interpolation of ys at x along increasing xs (held at the end values outside them)
+def _interp(x,xs,ys):
+    k=bisect.bisect_right(xs,x)
+    if 0==k:
+        return ys[0]
+    if len(xs)==k:
+        return ys[-1]
+    return ys[k-1]+(x-xs[k-1])*(ys[k]-ys[k-1])/(xs[k]-xs[k-1])
+
+#Finds final temperature when hydrogen is catalyzed from a known T_initial, P, and h_mix to an equilibrium T and Yo.  Isenthalpic, isobaric process.
+#Temperature between 14K and 500K.  Returns None if it doesn't converge (see T_isenth_solve for why it didn't)
+def T_isenth(P,h_mixture):
+    T,Yo,converged,evals=T_isenth_solve(P,h_mixture)
+    if not converged:
+        return None
+    return T
+
+#Equilibrium enthalpy of hydrogen at (T,P), and its slope with temperature, from one flash of each spin state
+#The slope is the equilibrium heat capacity: the mixture cp plus the conversion heat (h_ortho-h_para) times dYo/dT
+def _h_equilib(T,P):
+    Yo=float(Yo_equilib_vec(T))
+    h_ortho,cp_ortho=props('orthohydrogen','PT',P,T,'H','C')
+    h_para,cp_para=props('parahydrogen','PT',P,T,'H','C')
+    h=Yo*h_ortho+(1-Yo)*h_para
+    cp_eq=Yo*cp_ortho+(1-Yo)*cp_para+(h_ortho-h_para)*float(dYo_equilib_dT(T))
+    return h,cp_eq,Yo
+
+#Same problem as T_isenth, but doesn't print, and returns (T, Yo, converged, evals): final temperature, final ortho fraction, whether |h error| got below tol (J/kg),
+#and how many times the equilibrium enthalpy was evaluated (each one is a single flash of ortho and of para)
+#Uses Newton's method on the equilibrium enthalpy, with the equilibrium heat capacity as the slope, starting from a coarse table (see _T_start), so it usually needs
+#2-4 evaluations and no more than 7 (python -m h2props.benchmark --solver checks this over a grid of targets)
+#The bracket [T_min, T_max] is kept the whole time, and a step that would leave it, or that isn't under half the size of the step before last, is replaced by
+#bisection (the usual safeguard for Newton), so it can't run away or creep
+#If the target is inside the vapor dome there is no single-phase answer: the bracket shrinks onto the saturation temperature and it returns there with converged=False
+#(that takes 20-30 evaluations, mostly bisections, since closing the bracket to 1e-6 K takes that many halvings)
+#T_guess is where Newton starts (default: read off a coarse enthalpy table, see _T_start), a nearby previous answer makes it faster
+def T_isenth_solve(P,h_mixture,tol=0.000001,T_min=14.0,T_max=500.0,T_guess=None,max_iter=50):
+    if T_guess is None:
+        T_guess=float(_T_start(P,h_mixture))
+    T=min(max(T_guess,T_min),T_max)
+    Yo=float('nan')
+    dT=dT_old=T_max-T_min#last step and the one before
+    for evals in range(1,max_iter+1):
+        try:
+            h,cp_eq,Yo=_h_equilib(T,P)
+        except ValueError:#CoolProp can't flash here (below the triple point, right on the saturation line, ...), so treat it as too cold and bisect
+            T_min=T
+            T=0.5*(T_min+T_max)
+            continue
+        h_err=h-h_mixture
+        if abs(h_err)<=tol:
+            return T,Yo,True,evals
+        if h_err>0:
+            T_max=T
+        else:
+            T_min=T
+        T_new=T-h_err/cp_eq
+        if not (T_min<T_new<T_max) or abs(T_new-T)>0.5*abs(dT_old):
+            T_new=0.5*(T_min+T_max)
+        if T_max-T_min<=0.000001:#bracket has closed (to 1e-6 K) on a jump in h at saturation, there's nothing left to refine
+            return T,Yo,False,evals
+        dT_old,dT=dT,T_new-T
+        T=T_new
+    return T,Yo,False,max_iter
+
+#Array version of T_isenth_solve, for many (P, h_mixture) pairs at once.  P and h_mixture are broadcast against each other
+#Returns (T, Yo, converged), arrays of that shape.  Points that didn't converge (target in the vapor dome, or out of range) are left where their bracket closed, with converged=False
+#Every point keeps its own bracket and Newton step, exactly as in T_isenth_solve, and points drop out of the work as they converge, so each pass only flashes the ones left
+def T_isenth_vec(P,h_mixture,tol=0.000001,T_min=14.0,T_max=500.0,T_guess=None,max_iter=50):
+    if T_guess is None:
+        T_guess=_T_start(P,h_mixture)
+    return _equilib_vec('PT',P,h_mixture,'H','C',tol,T_min,T_max,T_guess,max_iter)
+
+#Finds final temperature when hydrogen in a sealed, rigid tank is catalyzed to equilibrium: constant internal energy and constant density (D, kg/m^3)
+#Temperature between 14K and 500K.  Returns None if it doesn't converge.  The final pressure is props(...,'DmassT',D,T,'P') of the mixture
+#Inside the vapor dome the tank just ends up two-phase, which is a real answer here (unlike at constant pressure)
+def T_isenthu(D,u_mixture):
+    T,Yo,converged=T_isenthu_vec(D,u_mixture)
+    if not converged:
+        return None
+    return float(T)
+
+#Array version of T_isenthu: D and u_mixture are broadcast against each other, returns (T, Yo, converged) like T_isenth_vec
+#Newton on the equilibrium internal energy at fixed density, with the slope cv + (u_ortho-u_para)*dYo/dT.  CoolProp's cv isn't du/dT for two-phase states,
+#so there the slope comes from the last two guesses instead (a secant step)
+#Like u_mix, the mixture is the mass average of pure ortho and para at the same T, here at the same density rather than the same pressure
+def T_isenthu_vec(D,u_mixture,tol=0.000001,T_min=14.0,T_max=500.0,T_guess=None,max_iter=50):
+    return _equilib_vec('DmassT',D,u_mixture,'U','O',tol,T_min,T_max,T_guess,max_iter)
+
+#Shared batched solver for the equilibrium temperature where the mixture property `output` (at the fixed input X, with T as the second input of `pair`) hits target
+#slope_output is the pure-component derivative of output with T at fixed X (cp for h at fixed P, cv for u at fixed density)
+def _equilib_vec(pair,X,target,output,slope_output,tol,T_min,T_max,T_guess,max_iter):
+    X,target=np.broadcast_arrays(np.asarray(X,dtype=float),np.asarray(target,dtype=float))
+    shape=X.shape
+    T_out=np.full(shape,np.nan)
+    Yo_out=np.full(shape,np.nan)
+    converged=np.zeros(shape,dtype=bool)
+
+    idx=np.flatnonzero(np.isfinite(X) & np.isfinite(target))#the points still being worked on
+    X_t=X.ravel()[idx]
+    y_t=target.ravel()[idx]
+    T_lo=np.full(idx.shape,T_min)
+    T_hi=np.full(idx.shape,T_max)
+    if T_guess is None:
+        T=0.5*(T_lo+T_hi)
+    else:
+        T=np.clip(np.broadcast_to(np.asarray(T_guess,dtype=float),shape).ravel()[idx],T_min,T_max)
+    T_prev=np.full(idx.shape,np.nan)#last guess and its error, for the secant slope
+    err_prev=np.full(idx.shape,np.nan)
+    dT=np.full(idx.shape,T_max-T_min)#last step and the one before, for the safeguard
+    dT_old=dT.copy()
+
+    for i in range(max_iter):
+        if 0==idx.size:
+            break
+        Yo=Yo_equilib_vec(T)
+        y_ortho,dy_ortho,Q_ortho=props('orthohydrogen',pair,X_t,T,output,slope_output,'Q')#nan where CoolProp can't flash
+        y_para,dy_para,Q_para=props('parahydrogen',pair,X_t,T,output,slope_output,'Q')
+        y=Yo*y_ortho+(1-Yo)*y_para
+        slope=Yo*dy_ortho+(1-Yo)*dy_para+(y_ortho-y_para)*dYo_equilib_dT(T)
+        err=y-y_t
+        failed=~np.isfinite(err)
+
+        done=~failed & (np.abs(err)<=tol)
+        T_out.ravel()[idx]=T#every point left keeps its latest temperature, so the ones that stop without converging still report where they ended up
+        Yo_out.ravel()[idx]=Yo
+        converged.ravel()[idx[done]]=True
+
+        #Tighten the brackets (a failed flash counts as too cold, like T_isenth_solve), then step
+        too_hot=~failed & (err>0)
+        T_hi=np.where(too_hot,T,T_hi)
+        T_lo=np.where(too_hot,T_lo,T)
+        two_phase=((Q_ortho>=0) & (Q_ortho<=1)) | ((Q_para>=0) & (Q_para<=1))
+        with np.errstate(invalid='ignore',divide='ignore'):
+            slope=np.where(two_phase,(err-err_prev)/(T-T_prev),slope)#nan on the first pass, which falls back to bisection
+            T_new=T-err/slope
+        outside=failed | ~((T_new>T_lo) & (T_new<T_hi)) | (np.abs(T_new-T)>0.5*np.abs(dT_old))#out of the bracket, or not shrinking fast enough
+        T_new[outside]=0.5*(T_lo[outside]+T_hi[outside])
+
+        keep=~done & (T_hi-T_lo>0.000001)#converged, or the bracket closed on a jump (h at saturation, at constant pressure)
+        T_prev=np.where(failed,T_prev,T)
+        err_prev=np.where(failed,err_prev,err)
+        dT_old,dT=dT,T_new-T
+        idx,X_t,y_t,T_lo,T_hi,T,T_prev,err_prev=idx[keep],X_t[keep],y_t[keep],T_lo[keep],T_hi[keep],T_new[keep],T_prev[keep],err_prev[keep]
+        dT,dT_old=dT[keep],dT_old[keep]
+    return T_out,Yo_out,converged
+
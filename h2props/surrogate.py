@@ -0,0 +1,201 @@
+#Title: "surrogate.py"
+#Organization: Washington State University, HYPER Lab
+#Purpose: Optional table-lookup backend for (P,T) properties.  Tabulates h, s, u, rho and cp of ortho and para hydrogen on a regular T-P grid once,
+#then answers props(fluid,'PT',P,T,...) by bicubic interpolation instead of a full Helmholtz EOS flash.
+#Off by default.  Build one with build_surrogate() and switch it on with use_surrogate() in engine.py.
+
+
+import array #flat copies of the coefficients for the scalar lookup
+import math #for log()
+import numpy as np
+from .refstate import get_CP
+from . import engine #flashes go through engine.flash (looked up at each call, so profiling.py can count them)
+
+
+#Matrix that turns 4 stencil values into the coefficients of the cubic through them, in powers of the local coordinate t (0 to 1 across the cell)
+def _cubic_matrix(start):
+    x=np.arange(start,start+4,dtype=float)
+    return np.linalg.inv(np.vander(x,4,increasing=True))
+
+#Keyed by where the stencil starts relative to the cell's lower grid point: -1 is the centered stencil, 0 and -2 are the one-sided ones at the first and last cells
+_M={s:_cubic_matrix(s) for s in (-2,-1,0)}
+
+
+#A built surrogate.  Holds the bicubic coefficients of every cell for every (fluid, output), and which cells are allowed to be used
+#   fluids, outputs: what it covers.  outputs use the PropsSI letters (H, S, U, D, C)
+#   T, P: the grid axes.  P is spaced evenly in ln(P) when log_P is True, otherwise evenly in P
+#   ok[fluid]: (nT-1, nP-1) boolean mask of the cells it will answer.  A cell is left out if its stencil crosses the saturation curve,
+#       has a point CoolProp couldn't solve, or its error bound is above tol.  Points in those cells (or outside the grid) get a real flash instead
+#   max_error[(fluid,output)]: bound on the relative error anywhere in the cells it does answer: safety times the largest error measured there (see build_surrogate)
+class Surrogate:
+    def __init__(self,fluids,outputs,T,P,log_P,coeffs,ok,max_error,tol):
+        self.fluids=tuple(fluids)
+        self.outputs=tuple(outputs)
+        self.T=T
+        self.P=P
+        self.log_P=log_P
+        self.tol=tol
+        self.coeffs=coeffs#(fluid,output) -> (nT-1, nP-1, 4, 4) array, [i,j,a,b] multiplies tT**a * tP**b
+        self.ok=ok
+        self.max_error=max_error
+        self._T0=float(T[0])
+        self._dT=float(T[1]-T[0])
+        self._nT=len(T)-1#number of cells along T
+        self._x0=float(math.log(P[0]) if log_P else P[0])
+        self._dx=float((math.log(P[-1]) if log_P else P[-1])-self._x0)/(len(P)-1)
+        self._nP=len(P)-1
+        #Flat copies for the scalar lookup.  Indexing an array.array or bytes gives a Python number straight away, so nothing is converted per call
+        self._flat={key:array.array('d',np.ascontiguousarray(c,dtype=float).tobytes()) for key,c in coeffs.items()}#16 coefficients per cell, cell i*nP+j
+        self._ok={fluid:np.ascontiguousarray(m,dtype=bool).tobytes() for fluid,m in ok.items()}
+        self._covers={}#(fluid, outputs) -> covers(), since the engine asks on every call
+
+    def covers(self,fluid,outputs):
+        outputs=tuple(outputs)
+        c=self._covers.get((fluid,outputs))
+        if c is None:
+            c=self._covers[(fluid,outputs)]=fluid in self.fluids and all(o in self.outputs for o in outputs)
+        return c
+
+    #Scalar lookup.  Returns a list of floats in the order of outputs, or None if (P,T) isn't in a usable cell
+    def lookup(self,fluid,P,T,outputs):
+        if not (P>0):
+            return None
+        u=(T-self._T0)/self._dT
+        v=((math.log(P) if self.log_P else P)-self._x0)/self._dx
+        i=int(math.floor(u))
+        j=int(math.floor(v))
+        if i==self._nT and u==i: i-=1#the upper edge of the grid belongs to the last cell
+        if j==self._nP and v==j: j-=1
+        if i<0 or j<0 or i>=self._nT or j>=self._nP:
+            return None
+        k=i*self._nP+j
+        if not self._ok[fluid][k]:
+            return None
+        k*=16
+        t=u-i
+        s=v-j
+        out=[]
+        for o in outputs:
+            c=self._flat[(fluid,o)][k:k+16]#[4*a+b] multiplies tT**a * tP**b
+            #Horner in tP for each power of tT, then Horner in tT
+            r0=((c[3]*s+c[2])*s+c[1])*s+c[0]
+            r1=((c[7]*s+c[6])*s+c[5])*s+c[4]
+            r2=((c[11]*s+c[10])*s+c[9])*s+c[8]
+            r3=((c[15]*s+c[14])*s+c[13])*s+c[12]
+            out.append(((r3*t+r2)*t+r1)*t+r0)
+        return out
+
+    #Array lookup.  P and T broadcast against each other.  Returns (values, usable): values has shape (len(outputs),)+shape, usable is the mask of points it answered
+    def lookup_array(self,fluid,P,T,outputs):
+        P,T=np.broadcast_arrays(np.asarray(P,dtype=float),np.asarray(T,dtype=float))
+        with np.errstate(divide='ignore',invalid='ignore'):
+            u=(T-self._T0)/self._dT
+            v=((np.log(P) if self.log_P else P)-self._x0)/self._dx
+        i=np.floor(u)
+        j=np.floor(v)
+        i=np.where((i==self._nT) & (u==i),i-1,i)
+        j=np.where((j==self._nP) & (v==j),j-1,j)
+        inside=(i>=0) & (j>=0) & (i<self._nT) & (j<self._nP)#False for nan too
+        i=np.where(inside,i,0).astype(int)
+        j=np.where(inside,j,0).astype(int)
+        usable=inside & self.ok[fluid][i,j]
+        t=np.where(usable,u-i,0.0)[...,np.newaxis]
+        s=np.where(usable,v-j,0.0)[...,np.newaxis]
+        values=np.full((len(outputs),)+P.shape,np.nan)
+        for k,o in enumerate(outputs):
+            c=self.coeffs[(fluid,o)][i,j]#(...,4,4)
+            r=((c[...,3]*s+c[...,2])*s+c[...,1])*s+c[...,0]
+            r=((r[...,3]*t[...,0]+r[...,2])*t[...,0]+r[...,1])*t[...,0]+r[...,0]
+            values[k]=np.where(usable,r,np.nan)
+        return values,usable
+
+
+#Bicubic coefficients of every cell from the grid values F (nT, nP).  Each cell uses the 4x4 block of grid points around it (shifted inward at the edges)
+#Returns the coefficients and the stencil start indices along each axis
+def _bicubic(F):
+    nT,nP=F.shape
+    iT=np.clip(np.arange(nT-1)-1,0,nT-4)#first stencil point of each cell along T
+    iP=np.clip(np.arange(nP-1)-1,0,nP-4)
+    MT=np.stack([_M[s-i] for i,s in enumerate(iT)])#(nT-1,4,4), the right matrix for each cell's stencil position
+    MP=np.stack([_M[s-j] for j,s in enumerate(iP)])
+    blocks=F[(iT[:,None]+np.arange(4))[:,None,:,None],(iP[:,None]+np.arange(4))[None,:,None,:]]#(nT-1,nP-1,4,4) stencil values
+    coeffs=np.einsum('iak,ijkl,jbl->ijab',MT,blocks,MP)
+    return coeffs,iT,iP
+
+#Largest value over each cell's 4x4 stencil, for a (nT, nP) grid of flags
+def _stencil_any(flag,iT,iP):
+    blocks=flag[(iT[:,None]+np.arange(4))[:,None,:,None],(iP[:,None]+np.arange(4))[None,:,None,:]]
+    return blocks.any(axis=(2,3))
+
+
+#Value of every cell's bicubic at local coordinates t (along T) and s (along P), both 0 to 1 across the cell: (nT-1, nP-1)
+def _evaluate(c,t,s):
+    r=((c[...,3]*s+c[...,2])*s+c[...,1])*s+c[...,0]
+    return ((r[...,3]*t+r[...,2])*t+r[...,1])*t+r[...,0]
+
+#Where build_surrogate checks the inside of every cell, in local coordinates (t, s): a 3x3 sample, which includes the center.  It checks the middle of each edge too
+_inside_checks=tuple((t,s) for t in (0.25,0.5,0.75) for s in (0.25,0.5,0.75))
+
+
+#Tabulates the fluids on a T-P grid and returns a Surrogate
+#   T_min, T_max, n_T: temperature axis (K), evenly spaced
+#   P_min, P_max, n_P: pressure axis (Pa), evenly spaced in ln(P) if log_P (the default), otherwise in P
+#   tol: largest relative error allowed anywhere in a cell, for every output.  Each cell is checked against a real flash at the middle of each of its edges and
+#       at a 3x3 sample of its inside (13 points), and its bound is safety times the largest error there.  Cells whose bound is above tol are flashed instead
+#   safety: how much bigger the error can be between the 13 points.  Against a 9x9 sample of every cell of the default tables, the worst cell was 1.5 times
+#       its 13-point error (entropy), so 2 leaves some margin.  Lower it for more usable cells and a looser bound
+#   Relative error is |error| / max(|exact|, 1e-3*largest |value| in the table), so outputs that cross zero (like parahydrogen enthalpy near the NBP) don't blow it up
+#The saturation curve is handled by never letting a cell's stencil reach across it: below the critical pressure, each grid point is marked liquid (T below Tsat)
+#or vapor, and any cell with both in its stencil is left to the real flash.  Since Tsat only rises with P, a cell whose corners are all on one side is entirely on that side
+#The exact values come from the AbstractState engine, which gives the same numbers as PropsSI
+def build_surrogate(fluids=('orthohydrogen','parahydrogen'),outputs=('H','S','U','D','C'),
+                    T_min=15.0,T_max=400.0,n_T=300,P_min=1.0e4,P_max=3.0e6,n_P=50,log_P=True,tol=1.0e-4,safety=2.0):
+    if n_T<4 or n_P<4:
+        raise ValueError("build_surrogate needs at least 4 grid points along T and P")
+    T=np.linspace(T_min,T_max,n_T)
+    P=np.geomspace(P_min,P_max,n_P) if log_P else np.linspace(P_min,P_max,n_P)
+    #T and P at local coordinate t or s of every cell (P is interpolated in ln(P) when log_P, like the lookup does)
+    T_at=lambda t:T[:-1]+t*(T[1:]-T[:-1])
+    P_at=lambda s:P[:-1]*(P[1:]/P[:-1])**s if log_P else P[:-1]+s*(P[1:]-P[:-1])
+
+    CP=get_CP()
+    coeffs={}
+    ok={}
+    max_error={}
+    for fluid in fluids:
+        exact=lambda Ts,Ps:np.reshape(engine.flash(fluid,'PT',Ps[np.newaxis,:],Ts[:,np.newaxis],*outputs),(len(outputs),len(Ts),len(Ps)))
+        values=exact(T,P)
+
+        #Liquid/vapor flag of every grid point.  Above the critical pressure there is no jump to avoid
+        P_crit=CP.PropsSI('pcrit',fluid)
+        T_sat=np.array([engine.flash(fluid,'PQ',p,0.0,'T') if p<P_crit else -np.inf for p in P])
+        liquid=T[:,np.newaxis]<T_sat[np.newaxis,:]
+        usable=np.ones((n_T-1,n_P-1),dtype=bool)
+        iT=iP=None
+        for k,o in enumerate(outputs):
+            c,iT,iP=_bicubic(values[k])
+            coeffs[(fluid,o)]=c
+            usable&=~_stencil_any(~np.isfinite(values[k]),iT,iP)
+        usable&=~(_stencil_any(liquid,iT,iP) & _stencil_any(~liquid,iT,iP))
+
+        #Exact values at the check points of every cell.  Neighbouring cells share edges, so each edge midpoint is only flashed once
+        along_T=exact(T_at(0.5),P)#(outputs, nT-1, nP): middle of the edges along T
+        along_P=exact(T,P_at(0.5))#(outputs, nT, nP-1)
+        checks=[((0.5,0.0),along_T[:,:,:-1]),((0.5,1.0),along_T[:,:,1:]),((0.0,0.5),along_P[:,:-1,:]),((1.0,0.5),along_P[:,1:,:])]
+        checks+=[((t,s),exact(T_at(t),P_at(s))) for t,s in _inside_checks]
+
+        #Error bound of every cell from the largest error over those points, and drop the ones that miss tol
+        err={}
+        for k,o in enumerate(outputs):
+            scale=1.0e-3*np.nanmax(np.abs(values[k]))
+            err[o]=np.zeros((n_T-1,n_P-1))
+            for (t,s),e in checks:
+                with np.errstate(invalid='ignore'):
+                    err[o]=np.fmax(err[o],np.abs(_evaluate(coeffs[(fluid,o)],t,s)-e[k])/np.maximum(np.abs(e[k]),scale))
+                err[o][~np.isfinite(e[k])]=np.inf#CoolProp couldn't solve a check point: the cell can't be trusted
+            err[o]*=safety
+            usable&=err[o]<=tol
+        for o in outputs:
+            max_error[(fluid,o)]=float(np.max(err[o][usable])) if usable.any() else float('nan')
+        ok[fluid]=usable
+    return Surrogate(fluids,outputs,T,P,log_P,coeffs,ok,max_error,tol)
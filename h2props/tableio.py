@@ -0,0 +1,244 @@
+#Title: "tableio.py"
+#Organization: Washington State University, HYPER Lab
+#Purpose: Writes (and reads back) the property tables from H2PropTableGenerator.py, as CSV or as binary column files that keep full float precision
+#and carry their own metadata (fluid, reference state, grid, CoolProp version)
+#   csv:     the original format, one row per line with a trailing comma (Star CCM+ reads it as is)
+#   npz:     numpy .npz, one float64 array per column plus the metadata as a JSON string.  Only needs numpy
+#   hdf5:    one dataset per column, metadata as attributes.  Needs h5py
+#   parquet: one column per property, metadata in the schema.  Needs pyarrow
+
+
+import json #metadata is stored as JSON text in every format
+import os #to remove the temporary file the npz is built from
+import zipfile #an npz is a zip of .npy files, built here a column at a time
+import numpy as np
+
+
+extensions={'csv':'.csv','npz':'.npz','hdf5':'.h5','parquet':'.parquet'}
+
+#Units of every column the generator writes
+units={"Temperature":"K","Pressure":"Pa","Density":"kg/m^3","Speed":"m/s","Conductivity":"W/m-K","Enthalpy":"J/kg","Entropy":"J/kg-K",
+       "Viscosity":"Pa-s","InternalE":"J/kg","Cp":"J/kg-K","Cv":"J/kg-K","CpMCv":"J/kg-K"}
+
+
+#Metadata written with a table: which fluid, which phase file, the grid it came from, the reference state and the CoolProp version
+#phase is 'S', 'L' or 'G' (supercritical, liquid, gas), matching the first letter of the file names
+#saturation=True marks a saturated liquid ('L') or saturated vapor ('G') table, which is a curve rather than a grid: pRange is then its saturation pressures
+#TRange can give every pressure its own temperatures (a dict, see refine_grid): T_grid then has every temperature any of them has, and T_grid['per_pressure']
+#the list of each pressure, in pRange order
+def table_metadata(fluid_thermo,fluid_transport,phase,TRange,pRange,header,saturation=False):
+    from .refstate import reference_state, coolprop_version
+    pRange=list(pRange)
+    per_pressure=None
+    if isinstance(TRange,dict):
+        per_pressure=[list(TRange[p]) for p in pRange]
+        TRange=sorted(set().union(*per_pressure))
+    TRange=list(TRange)
+    metadata={'fluid_thermo':fluid_thermo,'fluid_transport':fluid_transport,'phase':phase,
+              'columns':list(header),'units':[units.get(name,'') for name in header],
+              'T_grid':{'min':min(TRange),'max':max(TRange),'count':len(TRange),'values':TRange},
+              'P_grid':{'min':min(pRange),'max':max(pRange),'count':len(pRange),'values':pRange},
+              'reference_state':reference_state(fluid_thermo),
+              'coolprop_version':coolprop_version()}
+    if per_pressure is not None:
+        metadata['T_grid']['per_pressure']=per_pressure
+    if saturation:
+        metadata['saturation']=True
+    return metadata
+
+
+#Writes one table to path (the extension is added from fmt if it isn't there already) and returns the path written
+#rows is a list of rows in the order of header (what generate_rows returns, or any part of it).  metadata is a dict, see table_metadata (ignored for csv)
+def write_table(path,header,rows,metadata,fmt='csv'):
+    with TableWriter(path,header,metadata,fmt) as writer:
+        writer.write(rows)
+    return writer.path
+
+
+#Writes a table a piece at a time, so a whole grid never has to be in memory at once: call write() with each batch of rows as it is computed, then close()
+#(or use it in a with block).  Rows are held until buffer_rows of them have built up, then flushed, so memory stays the same however big the table gets
+#   csv:     appended to the file at every flush, so a run that dies part way still leaves every flushed row on disk
+#   npz:     the flushed rows go to a temporary file next to the table (path + '.part'); close() copies it into the npz one column at a time and deletes it
+#   hdf5:    appended to resizable datasets.  parquet: one row group per flush
+#Gives exactly the same files as writing all the rows at once
+class TableWriter:
+    def __init__(self,path,header,metadata,fmt='csv',buffer_rows=4096):
+        if fmt not in extensions:
+            raise ValueError("Unknown table format: "+str(fmt)+" (known formats: "+", ".join(extensions)+")")
+        if not path.endswith(extensions[fmt]):
+            path=path+extensions[fmt]
+        self.path=path
+        self.header=list(header)
+        self.metadata=metadata
+        self.fmt=fmt
+        self.buffer_rows=buffer_rows
+        self.count=0#rows flushed so far
+        self._buffer=[]
+        self._text=json.dumps(metadata)
+
+        if 'csv'==fmt:
+            self._file=open(path,'w')
+            self._file.write("".join(n+"," for n in self.header)+"\n")
+        elif 'npz'==fmt:
+            self._file=open(path+'.part','wb')
+        elif 'hdf5'==fmt:
+            try:
+                import h5py
+            except ImportError:
+                raise ImportError("Writing hdf5 tables needs h5py (pip install h5py)")
+            self._file=h5py.File(path,'w')
+            for name in self.header:
+                self._file.create_dataset(name,shape=(0,),maxshape=(None,),dtype='f8',chunks=True)
+            self._file.attrs['metadata']=self._text
+        elif 'parquet'==fmt:
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError:
+                raise ImportError("Writing parquet tables needs pyarrow (pip install pyarrow)")
+            schema=pyarrow.schema([(name,pyarrow.float64()) for name in self.header],metadata={'h2props':self._text})
+            self._file=pyarrow.parquet.ParquetWriter(path,schema)
+            self._schema=schema
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exc):
+        self.close()
+
+    #Adds rows (a list of rows in the order of header) to the table
+    def write(self,rows):
+        self._buffer.extend(rows)
+        if len(self._buffer)>=self.buffer_rows:
+            self.flush()
+
+    def flush(self):
+        rows=self._buffer
+        self._buffer=[]
+        if 'csv'==self.fmt:
+            for row in rows:
+                self._file.write("".join(str(n)+"," for n in row)+"\n")
+            #Note: Star CCM+ does not care if there is an extra comma before the newline key, so this should still upload just fine with the extra commas
+            self._file.flush()
+        elif rows:
+            data=np.array(rows,dtype=float).reshape(len(rows),len(self.header))
+            if 'npz'==self.fmt:
+                self._file.write(data.tobytes())#row after row of float64, turned into columns by close()
+            elif 'hdf5'==self.fmt:
+                for k,name in enumerate(self.header):
+                    dataset=self._file[name]
+                    dataset.resize((self.count+len(rows),))
+                    dataset[self.count:]=data[:,k]
+            elif 'parquet'==self.fmt:
+                import pyarrow
+                self._file.write_table(pyarrow.table({name:data[:,k] for k,name in enumerate(self.header)},schema=self._schema))
+        self.count+=len(rows)
+
+    def close(self):
+        if self._file is None:
+            return
+        self.flush()
+        if 'npz'==self.fmt:
+            self._file.close()
+            self._write_npz()
+        else:
+            self._file.close()
+        self._file=None
+
+    #Builds the npz from the .part file: the metadata first, then every column, each copied over in pieces (the same layout np.savez gives)
+    def _write_npz(self):
+        part=self.path+'.part'
+        n=self.count
+        ncol=len(self.header)
+        data=np.memmap(part,dtype='<f8',mode='r',shape=(n,ncol)) if n else np.zeros((0,ncol))
+        with zipfile.ZipFile(self.path,'w',zipfile.ZIP_STORED,allowZip64=True) as z:
+            with z.open('metadata.npy','w',force_zip64=True) as f:
+                np.lib.format.write_array(f,np.array(self._text))
+            for k,name in enumerate(self.header):
+                with z.open(name+'.npy','w',force_zip64=True) as f:
+                    np.lib.format.write_array_header_1_0(f,{'descr':'<f8','fortran_order':False,'shape':(n,)})
+                    for start in range(0,n,self.buffer_rows):
+                        f.write(np.ascontiguousarray(data[start:start+self.buffer_rows,k]).tobytes())
+        del data
+        os.remove(part)
+
+
+#Short names the generator's files use for each fluid
+fluid_names={'orthohydrogen':"ortho",'parahydrogen':"para",'hydrogen':"normal",'equilibrium':"equilib"}
+
+#Writes the S, L and G files of every fluid from the batches property_table (tables.py) hands its sink, in every format in formats
+#   name: file name pattern, with {phase} and {fluid} (the short name from fluid_names) filled in for each file, e.g. "{phase}{fluid}_100-180K_50000-500000Pa"
+#   TRange, pRange: the grid, for the metadata (TRange a list, or a dict of each pressure's temperatures)
+#All three phase files of a fluid are made as soon as its first rows arrive, even if some stay empty.  Points on the saturation line (phase '') are counted
+#in ignored and left out.  Call close() (or use a with block) at the end
+class TableSink:
+    def __init__(self,name,fluid_transport,TRange,pRange,formats=('csv',),buffer_rows=4096):
+        self.name=name
+        self.fluid_transport=fluid_transport
+        self.TRange=TRange if isinstance(TRange,dict) else list(TRange)
+        self.pRange=list(pRange)
+        self.formats=list(formats)
+        self.buffer_rows=buffer_rows
+        self.writers={}#fluid -> phase -> list of TableWriters
+        self.ignored=0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exc):
+        self.close()
+
+    def __call__(self,fluid,rows,phase):
+        writers=self.writers.get(fluid)
+        if writers is None:
+            from .tables import header
+            writers={}
+            for p in ("S","L","G"):
+                path=self.name.format(phase=p,fluid=fluid_names.get(fluid,fluid))
+                metadata=table_metadata(fluid,self.fluid_transport,p,self.TRange,self.pRange,header)
+                writers[p]=[TableWriter(path,header,metadata,fmt,self.buffer_rows) for fmt in self.formats]
+            self.writers[fluid]=writers
+        phase=np.asarray(phase)
+        self.ignored+=int(np.count_nonzero(phase==''))
+        for p,phaseWriters in writers.items():
+            phaseRows=[rows[k] for k in np.flatnonzero(phase==p)]
+            for writer in phaseWriters:
+                writer.write(phaseRows)
+
+    #Paths of every file written, as {fluid: {phase: [paths]}}
+    def paths(self):
+        return {fluid:{p:[w.path for w in ws] for p,ws in writers.items()} for fluid,writers in self.writers.items()}
+
+    def close(self):
+        for writers in self.writers.values():
+            for phaseWriters in writers.values():
+                for writer in phaseWriters:
+                    writer.close()
+
+
+#Reads a table written by write_table.  Returns (columns, metadata): columns is a dict of column name -> float64 array, in the file's column order
+#The format is taken from the extension.  CSV files have no metadata, so that comes back as {}
+def read_table(path):
+    fmt=next((f for f,ext in extensions.items() if path.endswith(ext)),None)
+    if fmt is None:
+        raise ValueError("Can't tell the table format of "+path+" (known extensions: "+", ".join(extensions.values())+")")
+
+    if 'csv'==fmt:
+        with open(path) as f:
+            header=[n for n in f.readline().rstrip("\n").split(",") if n]
+            rows=[[float(n) for n in line.rstrip("\n").split(",") if n] for line in f if line.strip()]
+        data=np.array(rows,dtype=float).reshape(len(rows),len(header))
+        return {name:data[:,k] for k,name in enumerate(header)},{}
+    if 'npz'==fmt:
+        with np.load(path) as f:
+            metadata=json.loads(str(f['metadata']))
+            return {name:f[name] for name in metadata['columns']},metadata
+    if 'hdf5'==fmt:
+        import h5py
+        with h5py.File(path,'r') as f:
+            metadata=json.loads(f.attrs['metadata'])
+            return {name:f[name][()] for name in metadata['columns']},metadata
+    import pyarrow.parquet
+    table=pyarrow.parquet.read_table(path)
+    metadata=json.loads(table.schema.metadata[b'h2props'])
+    return {name:table.column(name).to_numpy() for name in metadata['columns']},metadata
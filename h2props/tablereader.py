@@ -0,0 +1,287 @@
+#Title: "tablereader.py"
+#Organization: Washington State University, HYPER Lab
+#Purpose: Reads the tables H2PropTableGenerator.py writes and interpolates properties at any (T,P) inside the grid, without calling CoolProp
+#npz tables are memory-mapped rather than read, so opening one is almost free and every process reading the same file shares one copy in the page cache
+#(other formats are read into memory through read_table in tableio.py)
+
+
+import json #the npz metadata is a JSON string
+import os #for path handling
+import zipfile #to find where each column sits inside an npz
+import numpy as np
+from .tableio import read_table, extensions
+
+
+phases=('S','L','G')#supercritical, liquid, gas: the first letter of each generated file
+
+
+#Memory-maps every column of an uncompressed .npz (what write_table writes).  Returns (columns, metadata) like read_table
+def _mmap_npz(path):
+    columns={}
+    metadata=None
+    with zipfile.ZipFile(path) as z, open(path,'rb') as f:
+        for info in z.infolist():
+            name=info.filename[:-4]#drops ".npy"
+            f.seek(info.header_offset)
+            local=f.read(30)#fixed part of the zip local file header
+            start=info.header_offset+30+int.from_bytes(local[26:28],'little')+int.from_bytes(local[28:30],'little')
+            if info.compress_type!=zipfile.ZIP_STORED:#compressed members can't be mapped, so just read them
+                with z.open(info) as member:
+                    array=np.lib.format.read_array(member)
+            else:
+                f.seek(start)
+                version=np.lib.format.read_magic(f)
+                if (1,0)==version:
+                    shape,fortran,dtype=np.lib.format.read_array_header_1_0(f)
+                else:
+                    shape,fortran,dtype=np.lib.format.read_array_header_2_0(f)
+                if 0==np.prod(shape) or dtype.hasobject or dtype.kind in 'US':#empty, or the metadata string, which is small: just read it
+                    f.seek(start)
+                    array=np.lib.format.read_array(f)
+                else:
+                    array=np.memmap(path,dtype=dtype,mode='r',offset=f.tell(),shape=shape,order='F' if fortran else 'C')
+            if 'metadata'==name:
+                metadata=json.loads(str(array))
+            else:
+                columns[name]=array
+    return columns,metadata
+
+
+#Interpolation weights of the 4 points x4 (..., 4) at x (...), for a cubic through them.  Works for uneven spacing
+def _cubic_weights(x,x4):
+    w=np.ones(x4.shape)
+    for k in range(4):
+        for m in range(4):
+            if m!=k:
+                w[...,k]*=(x-x4[...,m])/(x4[...,k]-x4[...,m])
+    return w
+
+
+#Linear (2 points) or cubic (4 points, if there are 4) interpolation weights along one row of a table, whose temperatures Ts are sorted
+#Returns (pos, w, ok): which points of Ts (n, 2 or 4), their weights, and which x are inside Ts (the others get nothing)
+def _row_weights(x,Ts,cubic):
+    n=len(Ts)
+    if n<2:
+        ok=(x==Ts[0]) if n else np.zeros(x.shape,dtype=bool)
+        return np.zeros((len(x),1),dtype=int),np.ones((len(x),1)),ok
+    ok=(x>=Ts[0]) & (x<=Ts[-1])
+    i=np.clip(np.searchsorted(Ts,x,side='right')-1,0,n-2)
+    if cubic and n>=4:
+        pos=np.clip(i-1,0,n-4)[:,None]+np.arange(4)
+        return pos,_cubic_weights(x,Ts[pos]),ok
+    t=(x-Ts[i])/(Ts[i+1]-Ts[i])
+    return i[:,None]+np.arange(2),np.stack([1-t,t],axis=-1),ok
+
+
+#The liquid, gas and supercritical tables of one generator run, put back on their T-P grid
+#   paths: the table files (any of the S/L/G files from one run; missing phases are fine).  All of them must come from the same grid
+#   phase_of: (nT, nP) array of which file each grid point is in (index into self.phases, -1 if none), row_of: its row in that file
+#   by_row: True if the files don't fill the grid (every pressure has its own temperatures, see refine_grid, or a point on the saturation line was left out).
+#       query() then works along each pressure's own points instead, and phase_of and row_of are None
+class PropTable:
+    def __init__(self,paths):
+        self.phases=[]
+        self.columns=[]#one dict of column arrays per file (memory-mapped for npz)
+        self.metadata=None
+        for path in paths:
+            if path.endswith('.npz'):
+                columns,metadata=_mmap_npz(path)
+            else:
+                columns,metadata=read_table(path)
+            if self.metadata is None and metadata:
+                self.metadata=metadata
+            phase=(metadata or {}).get('phase') or os.path.basename(path)[0]
+            self.phases.append(phase)
+            self.columns.append(columns)
+        if not self.columns:
+            raise ValueError("PropTable needs at least one table file")
+        self.names=[n for n in self.columns[0] if n not in ('Temperature','Pressure')]
+
+        #The grid comes from the metadata if there is any, otherwise from the points themselves
+        if self.metadata is not None:
+            self.T=np.array(self.metadata['T_grid']['values'],dtype=float)
+            self.P=np.array(self.metadata['P_grid']['values'],dtype=float)
+        else:
+            self.T=np.unique(np.concatenate([np.asarray(c['Temperature']) for c in self.columns]))
+            self.P=np.unique(np.concatenate([np.asarray(c['Pressure']) for c in self.columns]))
+        self.by_row=sum(len(c['Temperature']) for c in self.columns)<len(self.T)*len(self.P)
+        if self.by_row:
+            self.phase_of=self.row_of=None
+            self._rows=[[None]*len(self.columns) for p in self.P]#[pressure][file] -> (temperatures, rows in the file), sorted
+            for k,c in enumerate(self.columns):
+                T=np.asarray(c['Temperature'])
+                j=np.searchsorted(self.P,np.asarray(c['Pressure']))
+                order=np.lexsort((T,j))
+                bounds=np.searchsorted(j[order],np.arange(len(self.P)+1))
+                for r in range(len(self.P)):
+                    rows=order[bounds[r]:bounds[r+1]]
+                    self._rows[r][k]=(T[rows],rows)
+            self._row_files=[]#[pressure] -> (every temperature it has, in any file, and which file)
+            for row in self._rows:
+                T=np.concatenate([t for t,rows in row])
+                k=np.concatenate([np.full(len(t),k) for k,(t,rows) in enumerate(row)])
+                order=np.argsort(T,kind='stable')
+                self._row_files.append((T[order],k[order]))
+            return
+        self.phase_of=np.full((len(self.T),len(self.P)),-1,dtype=np.int8)
+        self.row_of=np.zeros((len(self.T),len(self.P)),dtype=np.int64)
+        for k,c in enumerate(self.columns):
+            i=np.searchsorted(self.T,np.asarray(c['Temperature']))
+            j=np.searchsorted(self.P,np.asarray(c['Pressure']))
+            self.phase_of[i,j]=k
+            self.row_of[i,j]=np.arange(len(i))
+
+    #Interpolates properties at temperatures T (K) and pressures P (Pa), which are broadcast against each other
+    #Returns a dict of column name -> array (every column but Temperature and Pressure unless `columns` says which)
+    #method: 'bicubic' (4x4 points around the query) or 'bilinear' (the 4 corners).  Bicubic drops to bilinear where its 4x4 block isn't all one phase
+    #Only points from one phase file are ever combined, so nothing is interpolated across the saturation curve.  A query whose corners are in different files
+    #(it sits between the last liquid and first gas point) is nan, unless phase ('L', 'G' or 'S') says which side it's on and that side has all 4 corners.
+    #A query on a grid line can use the cell on either side of it, and one on a grid point returns that point's row, so points in a file always come back from it.
+    #Tables that don't fill their grid (by_row) are interpolated along T through each pressure's own points in the one file, then across pressures, which is the
+    #same bicubic or bilinear where the grid is full.  Bicubic takes 4 points along T where the file has them and 4 pressures where all 4 give a value, 2 otherwise
+    #Points outside the grid are nan too
+    def query(self,T,P,columns=None,method='bicubic',phase=None):
+        if method not in ('bicubic','bilinear'):
+            raise ValueError("method must be 'bicubic' or 'bilinear'")
+        names=self.names if columns is None else list(columns)
+        T,P=np.broadcast_arrays(np.asarray(T,dtype=float),np.asarray(P,dtype=float))
+        shape=T.shape
+        T=T.ravel()
+        P=P.ravel()
+        if self.by_row:
+            return self._query_rows(T,P,names,'bicubic'==method,phase,shape)
+        nT=len(self.T)
+        nP=len(self.P)
+
+        #Cell of each query: i,j is its lower corner
+        i=np.clip(np.searchsorted(self.T,T,side='right')-1,0,nT-2)
+        j=np.clip(np.searchsorted(self.P,P,side='right')-1,0,nP-2)
+        inside=(T>=self.T[0]) & (T<=self.T[-1]) & (P>=self.P[0]) & (P<=self.P[-1])
+
+        #Which file answers each query: the one all 4 corners are in (or the one asked for)
+        corners=self.phase_of[i[:,None,None]+np.arange(2)[:,None],j[:,None,None]+np.arange(2)]#(n,2,2)
+        want=corners[:,0,0] if phase is None else np.full(T.shape,self.phases.index(phase) if phase in self.phases else -2)
+        ok=inside & (want>=0) & (corners==want[:,None,None]).all(axis=(1,2))
+
+        #A query on a grid line is in the cells on both sides of it: if its own cell has corners in another file, use the cell below (in T, P or both) if that one doesn't
+        lineT=(T==self.T[i]) & (i>0)
+        lineP=(P==self.P[j]) & (j>0)
+        for di,dj in ((1,0),(0,1),(1,1)):
+            m=inside & (want>=0) & ~ok
+            if di:
+                m&=lineT
+            if dj:
+                m&=lineP
+            if m.any():
+                c=self.phase_of[i[m,None,None]-di+np.arange(2)[:,None],j[m,None,None]-dj+np.arange(2)]
+                m[m]=(c==want[m,None,None]).all(axis=(1,2))
+                i[m]-=di
+                j[m]-=dj
+                ok|=m
+
+        #Queries right on a grid point get the tabulated value itself (if it's in the file asked for)
+        iT=np.clip(np.searchsorted(self.T,T),0,nT-1)
+        jP=np.clip(np.searchsorted(self.P,P),0,nP-1)
+        hit=(T==self.T[iT]) & (P==self.P[jP])
+        if phase is None:
+            want=np.where(hit,self.phase_of[iT,jP],want)
+        hit&=(want>=0) & (self.phase_of[iT,jP]==want)
+        ok&=~hit
+
+        #Bicubic where the 4x4 block around the cell is in the same file, bilinear elsewhere
+        cubic=np.zeros(T.shape,dtype=bool)
+        if 'bicubic'==method and nT>=4 and nP>=4:
+            i4=np.clip(i-1,0,nT-4)
+            j4=np.clip(j-1,0,nP-4)
+            block=self.phase_of[i4[:,None,None]+np.arange(4)[:,None],j4[:,None,None]+np.arange(4)]#(n,4,4)
+            cubic=ok & (block==want[:,None,None]).all(axis=(1,2))
+        if cubic.any():
+            wT=_cubic_weights(T[cubic],self.T[i4[cubic,None]+np.arange(4)])
+            wP=_cubic_weights(P[cubic],self.P[j4[cubic,None]+np.arange(4)])
+            rows_c=self.row_of[i4[cubic,None,None]+np.arange(4)[:,None],j4[cubic,None,None]+np.arange(4)]
+        lin=ok & ~cubic
+        if lin.any():
+            tT=(T[lin]-self.T[i[lin]])/(self.T[i[lin]+1]-self.T[i[lin]])
+            tP=(P[lin]-self.P[j[lin]])/(self.P[j[lin]+1]-self.P[j[lin]])
+            wT2=np.stack([1-tT,tT],axis=-1)
+            wP2=np.stack([1-tP,tP],axis=-1)
+            rows_l=self.row_of[i[lin,None,None]+np.arange(2)[:,None],j[lin,None,None]+np.arange(2)]
+
+        out={}
+        for name in names:
+            values=np.full(T.shape,np.nan)
+            for k,c in enumerate(self.columns):
+                col=c[name]
+                m=cubic & (want==k)
+                if m.any():
+                    sel=m[cubic]
+                    values[m]=np.einsum('na,nab,nb->n',wT[sel],np.asarray(col[rows_c[sel]]),wP[sel])
+                m=lin & (want==k)
+                if m.any():
+                    sel=m[lin]
+                    values[m]=np.einsum('na,nab,nb->n',wT2[sel],np.asarray(col[rows_l[sel]]),wP2[sel])
+                m=hit & (want==k)
+                if m.any():
+                    values[m]=np.asarray(col[self.row_of[iT[m],jP[m]]])
+            out[name]=values.reshape(shape)
+        return out
+
+    #query() for a by_row table
+    def _query_rows(self,T,P,names,cubic,phase,shape):
+        n=len(T)
+        nP=len(self.P)
+        j=np.clip(np.searchsorted(self.P,P,side='right')-1,0,nP-2)
+        inside=(P>=self.P[0]) & (P<=self.P[-1])
+
+        #Which file answers each query: the one asked for, or the one the point at or below it along pressure j is in
+        if phase is None:
+            want=np.full(n,-1)
+            for r in np.unique(j[inside]):
+                m=inside & (j==r)
+                T_r,k_r=self._row_files[r]
+                if len(T_r):
+                    want[m]=k_r[np.clip(np.searchsorted(T_r,T[m],side='right')-1,0,len(T_r)-1)]
+        else:
+            want=np.full(n,self.phases.index(phase) if phase in self.phases else -1)
+
+        #Along T, at each of the pressures around the query (4 of them for bicubic, 2 for bilinear)
+        cubic_P=cubic and nP>=4
+        first=np.clip(j-1,0,nP-4) if cubic_P else j
+        width=4 if cubic_P else 2
+        along={name:np.full((n,width),np.nan) for name in names}
+        for o in range(width):
+            r=first+o
+            for row in np.unique(r[inside]):
+                for k,(T_k,rows) in enumerate(self._rows[row]):
+                    m=np.flatnonzero(inside & (r==row) & (want==k))
+                    if 0==len(m):
+                        continue
+                    pos,w,ok=_row_weights(T[m],T_k,cubic)
+                    if not ok.any():
+                        continue
+                    for name in names:
+                        along[name][m[ok],o]=np.einsum('na,na->n',w[ok],np.asarray(self.columns[k][name][rows[pos[ok]]]))
+
+        #Then across the pressures
+        out={}
+        tP=(P-self.P[j])/(self.P[j+1]-self.P[j])
+        at=j-first#where pressure j is among them
+        for name in names:
+            v=along[name]
+            lo=v[np.arange(n),at]
+            hi=v[np.arange(n),at+1]
+            values=np.where(0==tP,lo,np.where(1==tP,hi,(1-tP)*lo+tP*hi))#right on a pressure, the other one doesn't matter
+            if cubic_P:
+                full=np.isfinite(v).all(axis=1)
+                wP=_cubic_weights(P,self.P[first[:,None]+np.arange(4)])
+                values=np.where(full,np.einsum('na,na->n',wP,np.where(full[:,None],v,0.0)),values)
+            values[~inside]=np.nan
+            out[name]=values.reshape(shape)
+        return out
+
+
+#Opens the S/L/G tables of one generator run by the name it gave them, without the phase letter, e.g. open_table('ortho_100-180K_50000-500000Pa')
+#Phases whose file doesn't exist are skipped
+def open_table(name,directory='.',fmt='npz'):
+    paths=[os.path.join(directory,p+name+extensions[fmt]) for p in phases]
+    return PropTable([p for p in paths if os.path.exists(p)])
@@ -0,0 +1,329 @@
+#Title: "tables.py"
+#Organization: Washington State University, HYPER Lab
+#Purpose: Computes the rows of the property tables written by H2PropTableGenerator.py
+#Every (T,p) point is independent, so the pressure rows can be spread over a pool of processes
+
+
+import functools #for partial(), to hand the fixed arguments to the workers
+import multiprocessing #for the process pool
+import numpy as np
+
+from .refstate import get_CP
+from .engine import props
+from .orthopara import Yo_equilib_vec, dYo_equilib_dT
+
+
+#Column order of every table row
+#Property (our symbol, coolprop symbol): Units
+#Temperature (T,T): K
+#Pressure (P,P): Pa
+#Density (rho,D): kg/m^3
+#Speed of Sound (c,A): m/s
+#Thermal Conductivity (kappa,L): W/m-K
+#Enthalpy (H,H): J/kg
+#Entropy (S,S): J/kgK
+#Dynamic Viscosity (mu,V): Pa*s
+#Internal Energy (E,U): J/kg
+#Specific Heat (Cp,C): J/kgK (constant pressure)
+#Specific Heat (Cv,O): J/kgK (constant volume)
+#Specific Gas Constant (Cp-Cv): J/kgK
+header=["Temperature","Pressure","Density","Speed","Conductivity","Enthalpy","Entropy","Viscosity","InternalE","Cp","Cv","CpMCv"]
+
+
+#Returns one table row (a list in the order of header) for fluid_thermo ('orthohydrogen', 'parahydrogen' or 'hydrogen') at temperature T and pressure p
+#fluid_transport is the fluid viscosity is taken from (viscosity will not always be defined, otherwise)
+def table_row(T,p,fluid_thermo,fluid_transport='hydrogen'):
+    array=[None]*len(header)#initializes empty array of the same length as the header row
+
+    array[0]=T #adds temperature to the array in K
+    array[1]=p #adds pressure to the array in Pa
+
+    #One flash at (T,p) gives every thermodynamic property.  All of them are read off this same solved state
+    rhoCur,array[3],array[5],array[6],array[8],array[9],array[10] = props(fluid_thermo,'PT',p,T,'D','A','H','S','U','C','O')
+    array[2] = rhoCur #adds density in kg/m^3
+    array[11] = array[9]-array[10]#Cp-Cv=R, specific gas constnat (J/kgK)
+
+    #Transport properties get their own evaluation (shared with the saturation tables, see transport below)
+    array[4],array[7] = transport(T,p,rhoCur,fluid_thermo,fluid_transport)
+    return array
+
+#Thermal conductivity (W/m-K) and dynamic viscosity (Pa-s) of fluid_thermo at temperature T, pressure p and density rho, as (kappa, mu)
+#T, p and rho can be numbers or arrays of the same shape.  Arrays give arrays, with nan where CoolProp couldn't solve
+#Thermal conductivity is difficult
+#It isn't formulated for ortho, so I take a mass average of normal and para, which probably isn't accurate at all
+#Also, for para, it throws an error below 49.407K because the formulas are inaccurate.  So for that, we will assume normal hydrogen conductivity, which probably isn't very accurate
+#the CoolProp devs did this intentionally, see explanation here: https://github.com/CoolProp/CoolProp/blob/master/FAQ.md
+#No viscosity models are available for parahydrogen or orthohydrogen, but it should be exactly the same as normal hydrogen, so viscosity comes from fluid_transport
+#Conductivity of any other fluid is left empty (None, or nan for arrays)
+def transport(T,p,rho,fluid_thermo,fluid_transport='hydrogen'):
+    if np.ndim(T)==0 and np.ndim(p)==0 and np.ndim(rho)==0:
+        kappa=None
+        if "orthohydrogen" == fluid_thermo:
+            if 50<=T:
+                kappa = (1/0.75)*props('hydrogen','DmassT',rho,T,'L')-(1/0.75)*(0.25/1)*props('parahydrogen','DmassT',rho,T,'L')
+            else:
+                kappa = props('hydrogen','DmassT',rho,T,'L')
+            #No thermal conductitity models are available for orthohydrogen
+        elif "parahydrogen" == fluid_thermo:
+            if 50<=T:
+                kappa = props(fluid_thermo,'DmassT',rho,T,'L')
+            else:
+                kappa = props('hydrogen','DmassT',rho,T,'L')
+        elif "hydrogen" ==fluid_thermo:
+            kappa = props(fluid_thermo,'DmassT',rho,T,'L')
+        mu = props(fluid_transport,'DmassP',rho,p,'V') #Dynamic Viscosity (Pa-s)
+        return kappa,mu
+
+    #Arrays: the same rules, with each branch flashed for just the points it applies to
+    T=np.asarray(T,dtype=float)
+    p=np.asarray(p,dtype=float)
+    rho=np.asarray(rho,dtype=float)
+    kappa=np.full(T.shape,np.nan)
+    warm=(50<=T)
+    cold=~warm
+    if "orthohydrogen" == fluid_thermo:
+        kappa[warm] = (1/0.75)*props('hydrogen','DmassT',rho[warm],T[warm],'L')-(1/0.75)*(0.25/1)*props('parahydrogen','DmassT',rho[warm],T[warm],'L')
+        kappa[cold] = props('hydrogen','DmassT',rho[cold],T[cold],'L')
+    elif "parahydrogen" == fluid_thermo:
+        kappa[warm] = props(fluid_thermo,'DmassT',rho[warm],T[warm],'L')
+        kappa[cold] = props('hydrogen','DmassT',rho[cold],T[cold],'L')
+    elif "hydrogen" ==fluid_thermo:
+        kappa = props(fluid_thermo,'DmassT',rho,T,'L')
+    mu = props(fluid_transport,'DmassP',rho,p,'V')
+    return kappa,mu
+
+#The temperatures at pressure p: TRange itself, or TRange[p] if it gives every pressure its own list (a dict of pressure -> temperatures, as refine_grid returns)
+#Everything below that takes a TRange takes either
+def temperatures(TRange,p):
+    return TRange[p] if isinstance(TRange,dict) else TRange
+
+#All the rows at one pressure, in temperature order.  This is the piece of work handed to each process
+def pressure_rows(p,TRange,fluid_thermo,fluid_transport='hydrogen'):
+    return [table_row(T,p,fluid_thermo,fluid_transport) for T in temperatures(TRange,p)]
+
+#Returns the rows for every pressure in pRange and temperature in TRange, in the same order as the original loop (pressure outside, temperature inside)
+#processes=1 runs everything in this process.  Anything else spreads the pressures over a process pool (None uses every core)
+#Each worker loads CoolProp and sets the reference states before it computes anything, and the rows come back in pRange order no matter which worker finishes first
+#On Windows/macOS the workers re-run the calling script, so the script has to keep its work under if __name__ == "__main__":
+def generate_rows(TRange,pRange,fluid_thermo,fluid_transport='hydrogen',processes=1):
+    rows=[]
+    for pressureRows in iter_rows(TRange,pRange,fluid_thermo,fluid_transport,processes):
+        rows.extend(pressureRows)
+    return rows
+
+#Same as generate_rows, but hands the rows back one pressure at a time (a list of rows for each pressure, in pRange order) as they are computed,
+#so a caller that writes each batch out and lets it go never holds more than a few pressures' worth of rows
+#store: an optional PointStore (see pointcache.py).  Points it already has are read from it instead of computed, and every newly computed pressure is saved to it
+#before it is handed back, so a run that is stopped can be started again and only does the work that's left
+def iter_rows(TRange,pRange,fluid_thermo,fluid_transport='hydrogen',processes=1,store=None):
+    TRange=TRange if isinstance(TRange,dict) else list(TRange)
+    work=functools.partial(_missing_rows,fluid_thermo=fluid_thermo,fluid_transport=fluid_transport)
+    if store is None:#each pressure goes out with its temperatures
+        for p,pressureRows in _map(work,[(p,temperatures(TRange,p)) for p in pRange],processes):
+            yield pressureRows
+        return
+
+    #Every store access stays in this thread: SQLite won't let a connection be used from another one, and a process pool's imap pulls its items
+    #from a thread of its own.  So the list of work is made here, up front, before any of it is handed out
+    context=store.context(fluid_thermo,fluid_transport,header)
+    jobs=[]#each pressure, with the temperatures the store doesn't have yet
+    for p in pRange:
+        have=store.get(context,p,temperatures(TRange,p))
+        jobs.append((p,[T for T in temperatures(TRange,p) if T not in have]))
+    for p,newRows in _map(work,jobs,processes):
+        if newRows:
+            store.put(context,newRows)
+        have=store.get(context,p,temperatures(TRange,p))
+        yield [[T,p]+have[T] for T in temperatures(TRange,p)]
+
+#Rows for the temperatures in a (p, TRange) pair.  A separate function so the process pool can send it to the workers
+def _missing_rows(job,fluid_thermo,fluid_transport):
+    p,TRange=job
+    return p,pressure_rows(p,TRange,fluid_thermo,fluid_transport)
+
+#map() of work over items, in order, in this process or spread over a process pool
+def _map(work,items,processes):
+    if 1==processes:
+        for item in items:
+            yield work(item)
+        return
+    with multiprocessing.Pool(processes,initializer=get_CP) as pool:
+        for result in pool.imap(work,items):#imap hands results back in the order of items
+            yield result
+
+#Dtype of the structured arrays property_table returns: every column of header as float64, then the phase letter
+table_dtype=np.dtype([(name,'f8') for name in header]+[('Phase','U1')])
+
+#Computes a whole table in memory, with no files and no text: returns a numpy structured array (dtype table_dtype, one record per point, in generator
+#order: pressure outside, temperature inside) whose 'Phase' field is 'S', 'L', 'G', or '' for a point exactly on the saturation line
+#   fluid_thermo: one fluid name, or a list of spin states (any of spin_fluids), which are then all done in one pass by spin_rows and returned as {fluid: array}
+#   columns=True returns a dict of column name -> array (with 'Phase' last) instead of a structured array
+#   sink: optional function called as sink(fluid, rows, phase) with every pressure's rows (lists, in the order of header) and their phases as they're computed,
+#       e.g. a TableSink (tableio.py) to write the files at the same time.  keep=False then skips building the arrays (returns None), so memory stays flat
+#   processes, store: as in iter_rows (store only for a single fluid).  shared_transport: as in spin_rows
+#Ex: table=property_table(range(20,101),[1e5,2e5],'parahydrogen'); gas=table[table['Phase']=='G']
+def property_table(TRange,pRange,fluid_thermo,fluid_transport='hydrogen',processes=1,store=None,columns=False,sink=None,keep=True,shared_transport=True):
+    single=isinstance(fluid_thermo,str)
+    fluids=[fluid_thermo] if single else list(fluid_thermo)
+    if single:
+        batches=({fluid_thermo:rows} for rows in iter_rows(TRange,pRange,fluid_thermo,fluid_transport,processes,store))
+    else:
+        if store is not None:
+            raise ValueError("property_table can only use a store for a single fluid")
+        batches=iter_spin_rows(TRange,pRange,fluids,fluid_transport,processes,shared_transport)
+
+    kept={fluid:([],[]) for fluid in fluids}
+    for batch in batches:
+        for fluid,rows in batch.items():
+            phase=classify_phases([i[0] for i in rows],[i[1] for i in rows],fluid)
+            if sink is not None:
+                sink(fluid,rows,phase)
+            if keep:
+                kept[fluid][0].append(np.array(rows,dtype=float).reshape(len(rows),len(header)))
+                kept[fluid][1].append(phase)
+    if not keep:
+        return None
+
+    tables={}
+    for fluid,(data,phase) in kept.items():
+        data=np.concatenate(data) if data else np.zeros((0,len(header)))
+        table=np.empty(len(data),dtype=table_dtype)
+        for k,name in enumerate(header):
+            table[name]=data[:,k]
+        table['Phase']=np.concatenate(phase) if phase else []
+        tables[fluid]=table if not columns else {name:table[name] for name in table_dtype.names}
+    return tables[fluid_thermo] if single else tables
+
+#Every spin state spin_rows can tabulate in one pass.  'equilibrium' is hydrogen at the equilibrium ortho fraction of each temperature (see spin_rows)
+spin_fluids=('orthohydrogen','parahydrogen','hydrogen','equilibrium')
+
+#The rows of every fluid in fluids at pressure p and every temperature in TRange, as {fluid: rows}, with the same columns as table_row
+#Does one batched PT flash each of orthohydrogen, parahydrogen and normal hydrogen (only the ones needed), and builds every table from those:
+#   the normal hydrogen flash also gives the conductivity and viscosity every spin state shares, so they are worked out once per (T,p) instead of once per fluid
+#   conductivity follows the same rules as transport(), but with normal and para conductivity taken at the point's (T,p) rather than at each fluid's own density,
+#   and viscosity is fluid_transport's at (T,p).  In gas that changes them by well under 0.1%, but in the cold liquid, where viscosity depends strongly on density,
+#   para viscosity can move by about 2%.  shared_transport=False uses transport() at each fluid's own density instead, which gives exactly the numbers of table_row
+#   (at the cost of the extra transport flashes)
+#   'equilibrium' is the mass average of the ortho and para flashes at Yo_equilib(T), like h_mix.  Density averages the specific volumes.
+#   Cp and Cv include the heat of the composition shifting with temperature ((h_ortho-h_para)*dYo/dT, see dYo_equilib_dT).  Speed of sound is just mass-averaged (rough)
+#Points CoolProp can't flash are nan
+def spin_rows(p,TRange,fluids=spin_fluids,fluid_transport='hydrogen',shared_transport=True):
+    TRange=temperatures(TRange,p)
+    T=np.asarray(TRange,dtype=float)
+    thermo=('D','A','H','S','U','C','O')
+    warm=(50<=T)
+    need_ortho='orthohydrogen' in fluids or 'equilibrium' in fluids
+    need_para=need_ortho or 'parahydrogen' in fluids
+
+    #Normal hydrogen, with its conductivity and viscosity off the same flash
+    normal=np.array(props('hydrogen','PT',p,T,*(thermo+('L','V'))))
+    k_normal=normal[7]
+    mu=normal[8] if 'hydrogen'==fluid_transport else props(fluid_transport,'PT',p,T,'V')
+    pure={'hydrogen':normal[:7]}
+    kappa={'hydrogen':k_normal}
+
+    if need_para:#para conductivity only exists from 50K up, so it is only asked for there
+        para=np.full((8,len(T)),np.nan)
+        para[:,warm]=props('parahydrogen','PT',p,T[warm],*(thermo+('L',)))
+        para[:7,~warm]=props('parahydrogen','PT',p,T[~warm],*thermo)
+        pure['parahydrogen']=para[:7]
+        kappa['parahydrogen']=np.where(warm,para[7],k_normal)
+    if need_ortho:
+        pure['orthohydrogen']=np.array(props('orthohydrogen','PT',p,T,*thermo))
+        kappa['orthohydrogen']=np.where(warm,(1/0.75)*k_normal-(1/0.75)*(0.25/1)*para[7],k_normal)
+    mus={fluid:mu for fluid in pure}
+    if not shared_transport:
+        for fluid in pure:
+            kappa[fluid],mus[fluid]=transport(T,np.full(T.shape,float(p)),pure[fluid][0],fluid,fluid_transport)
+    if 'equilibrium' in fluids:
+        Yo=Yo_equilib_vec(T)
+        dYo=dYo_equilib_dT(T)
+        o=pure['orthohydrogen']
+        q=pure['parahydrogen']
+        mix=Yo*o+(1-Yo)*q
+        mix[0]=1/(Yo/o[0]+(1-Yo)/q[0])
+        mix[5]=mix[5]+(o[2]-q[2])*dYo#Cp: d(h)/dT at constant P, with Yo following T
+        mix[6]=mix[6]+(o[4]-q[4])*dYo#Cv: d(u)/dT, the same way
+        pure['equilibrium']=mix
+        kappa['equilibrium']=Yo*kappa['orthohydrogen']+(1-Yo)*kappa['parahydrogen']
+        mus['equilibrium']=Yo*mus['orthohydrogen']+(1-Yo)*mus['parahydrogen']
+
+    tables={}
+    for fluid in fluids:
+        rho,c,H,S,E,Cp,Cv=pure[fluid]
+        columns=np.array([rho,c,kappa[fluid],H,S,mus[fluid],E,Cp,Cv,Cp-Cv])#in the order of header, after T and p
+        tables[fluid]=[[TRange[k],p]+columns[:,k].tolist() for k in range(len(T))]
+    return tables
+
+#Same as iter_rows, but for several spin states at once (see spin_rows): hands back one {fluid: rows} dict per pressure, in pRange order
+def iter_spin_rows(TRange,pRange,fluids=spin_fluids,fluid_transport='hydrogen',processes=1,shared_transport=True):
+    TRange=TRange if isinstance(TRange,dict) else list(TRange)
+    work=functools.partial(_spin_job,fluids=tuple(fluids),fluid_transport=fluid_transport,shared_transport=shared_transport)
+    for tables in _map(work,[(p,temperatures(TRange,p)) for p in pRange],processes):
+        yield tables
+
+#spin_rows for a (p, TRange) pair, for the process pool (like _missing_rows)
+def _spin_job(job,fluids,fluid_transport,shared_transport):
+    p,TRange=job
+    return spin_rows(p,TRange,fluids,fluid_transport,shared_transport)
+
+#Phase of every point, as an array of 'S' (supercritical), 'L' (liquid), 'G' (gas), or '' for a point exactly on the saturation line (these get left out of the files)
+#T and p are arrays (or lists) of the points' temperatures and pressures
+#Same rules as the generator always used: above both critical values is supercritical, above only the critical temperature is gas, above only the critical pressure
+#is liquid, and below both it is compared with the saturation temperature.  The saturation temperature is found once per distinct pressure, not once per point
+#fluid_thermo='equilibrium' gives the phase ortho and para agree on, and '' where they don't (between their two saturation temperatures)
+def classify_phases(T,p,fluid_thermo):
+    if 'equilibrium'==fluid_thermo:
+        ortho=classify_phases(T,p,'orthohydrogen')
+        para=classify_phases(T,p,'parahydrogen')
+        return np.where(ortho==para,ortho,'')
+    CP=get_CP()
+    T=np.asarray(T,dtype=float)
+    p=np.asarray(p,dtype=float)
+    T_crit=CP.PropsSI(fluid_thermo,'Tcrit')
+    P_crit=CP.PropsSI(fluid_thermo,'Pcrit')
+
+    sub=(T<T_crit) & (p<P_crit)#the points that need the saturation curve
+    T_sat=np.full(T.shape,np.nan)
+    if sub.any():
+        pSat,where=np.unique(p[sub],return_inverse=True)
+        T_sat[sub]=props(fluid_thermo,'PQ',pSat,0.5,'T')[where]
+
+    phase=np.full(T.shape,'',dtype='<U1')
+    phase[sub & (T>T_sat)]='G'
+    phase[sub & (T<T_sat)]='L'
+    phase[(T>=T_crit) & (p<P_crit)]='G'
+    phase[(T<T_crit) & (p>=P_crit)]='L'
+    phase[(T>=T_crit) & (p>=P_crit)]='S'
+    return phase
+
+
+#Temperatures of a saturation table of fluid_thermo: its triple point, then every multiple of dT above it, up to (not including) the critical temperature
+#(there is no separate liquid and vapor at the critical point, and CoolProp won't flash it)
+def saturation_range(fluid_thermo,dT=1):
+    CP=get_CP()
+    T_triple=CP.PropsSI(fluid_thermo,'Ttriple')
+    T_crit=CP.PropsSI(fluid_thermo,'Tcrit')
+    first=int(np.floor(T_triple/dT))+1
+    last=int(np.ceil(T_crit/dT))-1
+    return [T_triple]+[float('%.12g' % (k*dT)) for k in range(first,last+1)]
+
+#Saturated liquid and saturated vapor rows of fluid_thermo at every temperature in TsatRange, as {'L': rows, 'G': rows}
+#The rows have the same columns as the single-phase tables (header), with the saturation pressure in the Pressure column, so they can be written and read the same way
+#Every property of each side comes from one batched flash, and conductivity and viscosity from transport() above, like the single-phase rows
+#Temperatures CoolProp can't flash (outside triple point to critical) are left out
+def saturation_rows(TsatRange,fluid_thermo,fluid_transport='hydrogen'):
+    T=np.asarray(TsatRange,dtype=float)
+    tables={}
+    for phase,Q in (('L',0),('G',1)):
+        p,rho,c,H,S,E,Cp,Cv=props(fluid_thermo,'QT',Q,T,'P','D','A','H','S','U','C','O')
+        kappa,mu=transport(T,p,rho,fluid_thermo,fluid_transport)
+        columns=np.array([T,p,rho,c,kappa,H,S,mu,E,Cp,Cv,Cp-Cv])#in the order of header
+        keep=~np.isnan(p)
+        tables[phase]=[[TsatRange[k]]+columns[1:,k].tolist() for k in np.flatnonzero(keep)]
+    return tables
+
+#Saturation rows (see saturation_rows) of every fluid in fluids, as {fluid: {'L': rows, 'G': rows}}
+#TsatRange is one list of temperatures for every fluid, or None to give each fluid its own saturation_range(fluid,dT)
+def saturation_tables(fluids=('orthohydrogen','parahydrogen','hydrogen'),TsatRange=None,dT=1,fluid_transport='hydrogen'):
+    return {fluid:saturation_rows(saturation_range(fluid,dT) if TsatRange is None else TsatRange,fluid,fluid_transport) for fluid in fluids}